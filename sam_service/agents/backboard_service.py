@@ -4,15 +4,20 @@ Provides a unified interface for Backboard.io API calls
 """
 import os
 import asyncio
+import logging
+import orjson
 from typing import Optional, Dict, Any
 from backboard import BackboardClient
 
+logger = logging.getLogger(__name__)
+
 class BackboardService:
     """Service wrapper for Backboard.io API"""
     
     _instance = None
     _clients = {}  # Store clients per event loop
     _assistants = {}  # Cache assistants by name/model
+    _assistant_creations = {}  # In-flight create_assistant calls by name
     _api_key = None
     
     def __new__(cls):
@@ -47,6 +52,17 @@ class BackboardService:
         if name in self._assistants:
             return self._assistants[name]
         
+        # Concurrent first requests for the same model (e.g. a compare fan-out right
+        # after startup) share one creation call instead of each creating an assistant
+        pending = self._assistant_creations.get(name)
+        if pending is None:
+            pending = asyncio.ensure_future(self._create_assistant(name, system_prompt))
+            self._assistant_creations[name] = pending
+            pending.add_done_callback(lambda _: self._assistant_creations.pop(name, None))
+        return await asyncio.shield(pending)
+    
+    async def _create_assistant(self, name: str, system_prompt: str) -> str:
+        """Create an assistant and cache its ID by name"""
         # Get client for current event loop
         client = self._get_client()
         
@@ -152,7 +168,7 @@ class BackboardService:
         
         # Log mapping if changed
         if backboard_model_name != model_name or final_provider != llm_provider:
-            print(f"ℹ️ Mapping model '{model_name}' (provider: {llm_provider}) to '{backboard_model_name}' (provider: {final_provider}) for Backboard.io", flush=True)
+            logger.debug("ℹ️ Mapping model '%s' (provider: %s) to '%s' (provider: %s) for Backboard.io", model_name, llm_provider, backboard_model_name, final_provider)
         
         llm_provider = final_provider
         
@@ -181,7 +197,7 @@ class BackboardService:
                 if attempt < max_attempts - 1:
                     # If Gemini model times out, fallback to gpt-4o
                     if llm_provider == 'google' and 'gemini' in backboard_model_name.lower():
-                        print(f"⚠️ Gemini model '{backboard_model_name}' timed out, trying 'gpt-4o' (provider: openai) as fallback", flush=True)
+                        logger.warning("⚠️ Gemini model '%s' timed out, trying 'gpt-4o' (provider: openai) as fallback", backboard_model_name)
                         llm_provider = 'openai'
                         backboard_model_name = 'gpt-4o'
                         # Create new thread for fallback
@@ -189,13 +205,13 @@ class BackboardService:
                         thread_id = thread.thread_id if hasattr(thread, 'thread_id') else (thread.id if hasattr(thread, 'id') else str(thread))
                         continue
                     else:
-                        print(f"⚠️ Request timed out, retrying ({attempt + 1}/{max_attempts})...", flush=True)
+                        logger.warning("⚠️ Request timed out, retrying (%s/%s)...", attempt + 1, max_attempts)
                         await asyncio.sleep(2)
                         continue
                 else:
                     # Final attempt failed, try gpt-4o as last resort
                     if llm_provider != 'openai' or backboard_model_name != 'gpt-4o':
-                        print(f"⚠️ All retries failed, trying 'gpt-4o' (provider: openai) as final fallback", flush=True)
+                        logger.warning("⚠️ All retries failed, trying 'gpt-4o' (provider: openai) as final fallback")
                         llm_provider = 'openai'
                         backboard_model_name = 'gpt-4o'
                         # Create new thread for fallback
@@ -224,7 +240,7 @@ class BackboardService:
                     if attempt < max_attempts - 1:
                         # If Gemini model times out, fallback to gpt-4o
                         if llm_provider == 'google' and 'gemini' in backboard_model_name.lower():
-                            print(f"⚠️ Gemini model '{backboard_model_name}' timed out, trying 'gpt-4o' (provider: openai) as fallback", flush=True)
+                            logger.warning("⚠️ Gemini model '%s' timed out, trying 'gpt-4o' (provider: openai) as fallback", backboard_model_name)
                             llm_provider = 'openai'
                             backboard_model_name = 'gpt-4o'
                             # Create new thread for fallback
@@ -232,13 +248,13 @@ class BackboardService:
                             thread_id = thread.thread_id if hasattr(thread, 'thread_id') else (thread.id if hasattr(thread, 'id') else str(thread))
                             continue
                         else:
-                            print(f"⚠️ Request timed out, retrying ({attempt + 1}/{max_attempts})...", flush=True)
+                            logger.warning("⚠️ Request timed out, retrying (%s/%s)...", attempt + 1, max_attempts)
                             await asyncio.sleep(2)
                             continue
                     else:
                         # Final attempt failed, try gpt-4o as last resort
                         if llm_provider != 'openai' or backboard_model_name != 'gpt-4o':
-                            print(f"⚠️ All retries failed, trying 'gpt-4o' (provider: openai) as final fallback", flush=True)
+                            logger.warning("⚠️ All retries failed, trying 'gpt-4o' (provider: openai) as final fallback")
                             llm_provider = 'openai'
                             backboard_model_name = 'gpt-4o'
                             # Create new thread for fallback
@@ -262,7 +278,7 @@ class BackboardService:
                 # If model not supported, try with gpt-4o as fallback
                 if 'not supported' in error_msg.lower() or 'supported models' in error_msg.lower():
                     if attempt < max_attempts - 1:
-                        print(f"⚠️ Model '{backboard_model_name}' (provider: {llm_provider}) not supported, trying 'gpt-4o' (provider: openai) as fallback", flush=True)
+                        logger.warning("⚠️ Model '%s' (provider: %s) not supported, trying 'gpt-4o' (provider: openai) as fallback", backboard_model_name, llm_provider)
                         llm_provider = 'openai'
                         backboard_model_name = 'gpt-4o'
                         # Create new thread for fallback
@@ -334,13 +350,13 @@ class BackboardService:
                 break
             except asyncio.TimeoutError:
                 if attempt < max_retries - 1:
-                    print(f"⚠️ Backboard.io request timed out after {timeout}s, retrying ({attempt + 1}/{max_retries})...", flush=True)
+                    logger.warning("⚠️ Backboard.io request timed out after %ss, retrying (%s/%s)...", timeout, attempt + 1, max_retries)
                     await asyncio.sleep(2)  # Wait before retry
                     continue
                 raise ValueError(f"Backboard.io image generation timed out after {timeout} seconds")
             except Exception as e:
                 if "timeout" in str(e).lower() and attempt < max_retries - 1:
-                    print(f"⚠️ Backboard.io request timed out, retrying ({attempt + 1}/{max_retries})...", flush=True)
+                    logger.warning("⚠️ Backboard.io request timed out, retrying (%s/%s)...", attempt + 1, max_retries)
                     await asyncio.sleep(2)  # Wait before retry
                     continue
                 raise
@@ -368,12 +384,12 @@ class BackboardService:
             content = str(response)
         
         # Log response structure for debugging
-        print(f"🔍 Image response type: {type(response)}", flush=True)
+        logger.debug("🔍 Image response type: %s", type(response))
         if hasattr(response, '__dict__'):
-            print(f"   Response attributes: {list(response.__dict__.keys())[:10]}", flush=True)
-        print(f"   Content type: {type(content)}, Length: {len(str(content)) if content else 0}", flush=True)
+            logger.debug("   Response attributes: %s", list(response.__dict__.keys())[:10])
+        logger.debug("   Content type: %s, Length: %s", type(content), len(str(content)) if content else 0)
         if content and isinstance(content, str):
-            print(f"   Content preview: {content[:200]}...", flush=True)
+            logger.debug("   Content preview: %s...", content[:200])
         
         # Check if content is actually text (not an image)
         # If it starts with text like "Here's an illustration" or doesn't look like image data, it's likely text
@@ -394,7 +410,7 @@ class BackboardService:
                 # But first check if it's clearly text
                 if any(content.startswith(prefix) for prefix in ['Here\'s', 'Here is', 'This is', 'The image', 'An illustration']):
                     # This is text, not an image - Backboard.io returned text instead of image
-                    print(f"⚠️ Backboard.io returned text instead of image: {content[:100]}...", flush=True)
+                    logger.warning("⚠️ Backboard.io returned text instead of image: %s...", content[:100])
                     raise ValueError(f"Backboard.io image generation returned text instead of an image URL or base64 data. The model may not support image generation, or the prompt needs to be adjusted.")
                 # Might be base64, return it
                 return content
@@ -420,7 +436,7 @@ class BackboardService:
                     url = attachment.data
                 
                 if url:
-                    print(f"✅ Found image in attachments: {url[:100]}...", flush=True)
+                    logger.debug("✅ Found image in attachments: %s...", url[:100])
                     return url
         
         # Check if response has files or images
@@ -441,42 +457,41 @@ class BackboardService:
                     url = file.file_id
                 
                 if url:
-                    print(f"✅ Found image in files: {url[:100]}...", flush=True)
+                    logger.debug("✅ Found image in files: %s...", url[:100])
                     return url
         
         # If content is JSON, try to parse it
-        import json
         try:
             if isinstance(content, str):
                 # Try parsing as JSON
-                parsed = json.loads(content)
+                parsed = orjson.loads(content)
                 if isinstance(parsed, dict):
                     # Check for various image URL keys
                     for key in ['image_url', 'url', 'image', 'file_url', 'imageUrl', 'imageData', 'data']:
                         if key in parsed:
                             value = parsed[key]
                             if value and (isinstance(value, str) and (value.startswith('http') or value.startswith('data:image') or len(value) > 100)):
-                                print(f"✅ Found image in JSON key '{key}': {str(value)[:100]}...", flush=True)
+                                logger.debug("✅ Found image in JSON key '%s': %s...", key, str(value)[:100])
                                 return value
-        except json.JSONDecodeError:
+        except orjson.JSONDecodeError:
             # Not JSON, continue
             pass
         except Exception as e:
-            print(f"⚠️ Error parsing JSON content: {e}", flush=True)
+            logger.warning("⚠️ Error parsing JSON content: %s", e)
             pass
         
         # If we get here and content looks like text, it's an error
         if isinstance(content, str) and any(content.startswith(prefix) for prefix in ['Here\'s', 'Here is', 'This is', 'The image', 'An illustration', 'I\'ll', 'I will']):
-            print(f"⚠️ Backboard.io returned text instead of image: {content[:200]}...", flush=True)
+            logger.warning("⚠️ Backboard.io returned text instead of image: %s...", content[:200])
             raise ValueError(f"Backboard.io image generation returned text instead of an image URL or base64 data. Response: {content[:200]}...")
         
         # If content is empty or very short, it's likely an error
         if not content or (isinstance(content, str) and len(content.strip()) < 50):
-            print(f"❌ Backboard.io returned empty or very short content: {repr(content)}", flush=True)
+            logger.error("❌ Backboard.io returned empty or very short content: %s", repr(content))
             raise ValueError(f"Backboard.io image generation returned empty content. The model may not support image generation or the response format is unexpected.")
         
         # Return content as-is (might be base64 or URL string)
-        print(f"✅ Returning image content (type: {type(content)}, length: {len(str(content))})", flush=True)
+        logger.debug("✅ Returning image content (type: %s, length: %s)", type(content), len(str(content)))
         return content
 
 # Global instance
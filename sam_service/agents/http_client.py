@@ -0,0 +1,56 @@
+"""
+Shared HTTP Client for Agents
+Provides one pooled HTTP/2 client for agents that call external APIs directly
+(ElevenLabs, OpenRouter) instead of going through the Backboard.io SDK
+"""
+import asyncio
+import weakref
+import httpx
+
+# Statuses worth retrying (rate limits and transient upstream failures)
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# Store clients per event loop - an AsyncClient is bound to the loop it was created on
+_clients = weakref.WeakKeyDictionary()
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get or create the shared AsyncClient for the current event loop"""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            http2=True,
+            timeout=httpx.Timeout(120.0, connect=10.0),
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=50)
+        )
+        _clients[loop] = client
+    return client
+
+
+async def post_with_retry(url: str, retries: int = 3, backoff_factor: float = 0.3, **kwargs) -> httpx.Response:
+    """
+    POST through the shared client, retrying rate-limited/transient responses
+
+    Args:
+        url: Request URL
+        retries: Number of retries after the first attempt
+        backoff_factor: Base delay in seconds, doubled on each retry
+        **kwargs: Passed through to httpx.AsyncClient.post
+
+    Returns:
+        The last response received (callers still call raise_for_status)
+    """
+    client = get_http_client()
+    for attempt in range(retries + 1):
+        response = await client.post(url, **kwargs)
+        if response.status_code not in RETRY_STATUSES or attempt == retries:
+            return response
+        await asyncio.sleep(backoff_factor * (2 ** attempt))
+
+
+async def close_http_client():
+    """Close the shared client for the current event loop (call on shutdown)"""
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
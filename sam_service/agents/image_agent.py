@@ -21,12 +21,18 @@ class Agent:
 class Tool:
     pass
 import os
-import requests
+import asyncio
+import httpx
 import json
+import logging
+import orjson
 import time
 import base64
 import boto3
 from botocore.exceptions import ClientError
+from .http_client import get_http_client
+
+logger = logging.getLogger(__name__)
 
 class ImageAgent(Agent):
     """Agent that generates images for educational slides with multiple model support"""
@@ -50,7 +56,7 @@ class ImageAgent(Agent):
         self.openrouter_api_key = os.getenv("OPENROUTER_API_KEY")
         self.openrouter_base_url = "https://openrouter.ai/api/v1"
         if not self.openrouter_api_key:
-            print("⚠️ OPENROUTER_API_KEY not configured", flush=True)
+            logger.warning("⚠️ OPENROUTER_API_KEY not configured")
         
         # S3 configuration
         self.use_s3 = os.getenv("USE_S3", "false").lower() == "true"
@@ -60,12 +66,13 @@ class ImageAgent(Agent):
         self.aws_secret_access_key = os.getenv("AWS_SECRET_ACCESS_KEY")
         
         # Debug S3 configuration
-        print(f"🔍 Image Agent S3 Configuration Check:", flush=True)
-        print(f"   USE_S3: {self.use_s3}", flush=True)
-        print(f"   AWS_S3_BUCKET: {self.s3_bucket if self.s3_bucket else 'NOT SET'}", flush=True)
-        print(f"   AWS_REGION: {self.s3_region}", flush=True)
-        print(f"   AWS_ACCESS_KEY_ID: {'SET' if self.aws_access_key_id else 'NOT SET'}", flush=True)
-        print(f"   AWS_SECRET_ACCESS_KEY: {'SET' if self.aws_secret_access_key else 'NOT SET'}", flush=True)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("🔍 Image Agent S3 Configuration Check:")
+            logger.info("   USE_S3: %s", self.use_s3)
+            logger.info("   AWS_S3_BUCKET: %s", self.s3_bucket if self.s3_bucket else 'NOT SET')
+            logger.info("   AWS_REGION: %s", self.s3_region)
+            logger.info("   AWS_ACCESS_KEY_ID: %s", 'SET' if self.aws_access_key_id else 'NOT SET')
+            logger.info("   AWS_SECRET_ACCESS_KEY: %s", 'SET' if self.aws_secret_access_key else 'NOT SET')
         
         # Initialize S3 client if configured
         self.s3_client = None
@@ -77,14 +84,19 @@ class ImageAgent(Agent):
                     aws_access_key_id=self.aws_access_key_id,
                     aws_secret_access_key=self.aws_secret_access_key
                 )
-                print(f"✅ S3 client initialized for bucket: {self.s3_bucket}", flush=True)
+                # Public object URL prefix never changes, so build it once
+                if self.s3_region == 'us-east-1':
+                    self._s3_url_prefix = f"https://{self.s3_bucket}.s3.amazonaws.com"
+                else:
+                    self._s3_url_prefix = f"https://{self.s3_bucket}.s3.{self.s3_region}.amazonaws.com"
+                logger.info("✅ S3 client initialized for bucket: %s", self.s3_bucket)
             except Exception as e:
-                print(f"❌ Failed to initialize S3 client: {e}", flush=True)
-                print("⚠️ Falling back to returning image data directly", flush=True)
+                logger.error("❌ Failed to initialize S3 client: %s", e)
+                logger.warning("⚠️ Falling back to returning image data directly")
                 self.use_s3 = False
         elif self.use_s3:
-            print("⚠️ S3 enabled but missing required configuration. Images will be returned directly.", flush=True)
-            print("   Required: AWS_S3_BUCKET, AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY", flush=True)
+            logger.warning("⚠️ S3 enabled but missing required configuration. Images will be returned directly.")
+            logger.warning("   Required: AWS_S3_BUCKET, AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY")
             self.use_s3 = False
         
         # Register tool
@@ -144,28 +156,28 @@ class ImageAgent(Agent):
         
         # Validate that we got actual image data
         if not image_data or (isinstance(image_data, str) and len(image_data.strip()) == 0):
-            print(f"❌ Image generation returned empty data for slide {slide_number}", flush=True)
-            print(f"   Provider: {provider}, Model: {model_name}", flush=True)
+            logger.error("❌ Image generation returned empty data for slide %s", slide_number)
+            logger.error("   Provider: %s, Model: %s", provider, model_name)
             raise ValueError(f"Image generation returned empty data. The model '{model_name}' may not have generated an image, or the response format is unexpected.")
         
         # Log successful image generation
         if isinstance(image_data, str):
             if image_data.startswith('http'):
-                print(f"✅ Generated image URL: {image_data[:100]}...", flush=True)
+                logger.debug("✅ Generated image URL: %s...", image_data[:100])
             elif image_data.startswith('data:image'):
-                print(f"✅ Generated image data URL (base64, length: {len(image_data)})", flush=True)
+                logger.debug("✅ Generated image data URL (base64, length: %s)", len(image_data))
             else:
-                print(f"✅ Generated image data (length: {len(image_data)})", flush=True)
+                logger.debug("✅ Generated image data (length: %s)", len(image_data))
         
         # Upload to S3 if configured
         if self.use_s3 and self.s3_client:
             try:
                 s3_url = await self._upload_image_to_s3(image_data, slide_number, topic)
-                print(f"✅ Uploaded image to S3: {s3_url}", flush=True)
+                logger.debug("✅ Uploaded image to S3: %s", s3_url)
                 return s3_url
             except Exception as e:
-                print(f"❌ S3 upload error: {e}", flush=True)
-                print("⚠️ Returning image data directly", flush=True)
+                logger.error("❌ S3 upload error: %s", e)
+                logger.warning("⚠️ Returning image data directly")
         
         # Return image data directly if S3 is not configured or upload failed
         return image_data
@@ -200,12 +212,12 @@ class ImageAgent(Agent):
                 "modalities": ["image", "text"]  # Request image generation
             }
             
-            print(f"🔍 Calling OpenRouter API for image generation", flush=True)
-            print(f"   Model: {model}", flush=True)
-            print(f"   Prompt length: {len(prompt)}", flush=True)
+            logger.debug("🔍 Calling OpenRouter API for image generation")
+            logger.debug("   Model: %s", model)
+            logger.debug("   Prompt length: %s", len(prompt))
             
-            # Make request with longer timeout for image generation
-            response = requests.post(
+            # Make request with longer timeout for image generation (shared pooled client)
+            response = await get_http_client().post(
                 f"{self.openrouter_base_url}/chat/completions",
                 headers=headers,
                 json=request_body,
@@ -213,7 +225,8 @@ class ImageAgent(Agent):
             )
             response.raise_for_status()
             
-            result = response.json()
+            # Image responses carry multi-MB base64 payloads; orjson parses the raw bytes directly
+            result = orjson.loads(response.content)
             
             # Check for errors in the response
             if result.get("choices") and len(result["choices"]) > 0:
@@ -225,7 +238,7 @@ class ImageAgent(Agent):
                     # Check for nested error in metadata
                     if error_info.get("metadata") and error_info["metadata"].get("raw"):
                         try:
-                            raw_error = json.loads(error_info["metadata"]["raw"])
+                            raw_error = orjson.loads(error_info["metadata"]["raw"])
                             if raw_error.get("error"):
                                 nested_error = raw_error["error"]
                                 error_message = nested_error.get("message", error_message)
@@ -246,16 +259,16 @@ class ImageAgent(Agent):
                                 image_url = img_item["image_url"]
                                 if isinstance(image_url, dict) and image_url.get("url"):
                                     image_data = image_url["url"]
-                                    print(f"✅ Extracted image from images[].image_url.url", flush=True)
+                                    logger.debug("✅ Extracted image from images[].image_url.url")
                                     return image_data
                                 elif isinstance(image_url, str):
-                                    print(f"✅ Extracted image from images[].image_url (string)", flush=True)
+                                    logger.debug("✅ Extracted image from images[].image_url (string)")
                                     return image_url
                             if img_item.get("image"):
-                                print(f"✅ Extracted image from images[].image", flush=True)
+                                logger.debug("✅ Extracted image from images[].image")
                                 return img_item["image"]
                             if img_item.get("url"):
-                                print(f"✅ Extracted image from images[].url", flush=True)
+                                logger.debug("✅ Extracted image from images[].url")
                                 return img_item["url"]
                 
                 # Check for image content in array format
@@ -264,7 +277,7 @@ class ImageAgent(Agent):
                     # First check for type: "image" with image field (base64 data)
                     image_content = next((item for item in content if item.get("type") == "image"), None)
                     if image_content and image_content.get("image"):
-                        print(f"✅ Extracted image from content[].image", flush=True)
+                        logger.debug("✅ Extracted image from content[].image")
                         return image_content["image"]
                     
                     # Fallback to image_url type
@@ -272,50 +285,50 @@ class ImageAgent(Agent):
                     if image_url_content and image_url_content.get("image_url"):
                         image_url = image_url_content["image_url"]
                         if isinstance(image_url, dict) and image_url.get("url"):
-                            print(f"✅ Extracted image from content[].image_url.url", flush=True)
+                            logger.debug("✅ Extracted image from content[].image_url.url")
                             return image_url["url"]
                         elif isinstance(image_url, str):
-                            print(f"✅ Extracted image from content[].image_url (string)", flush=True)
+                            logger.debug("✅ Extracted image from content[].image_url (string)")
                             return image_url
                 
                 # Check for image_url directly in message
                 if message.get("image_url"):
                     image_url = message["image_url"]
                     if isinstance(image_url, dict) and image_url.get("url"):
-                        print(f"✅ Extracted image from message.image_url.url", flush=True)
+                        logger.debug("✅ Extracted image from message.image_url.url")
                         return image_url["url"]
                     elif isinstance(image_url, str):
-                        print(f"✅ Extracted image from message.image_url (string)", flush=True)
+                        logger.debug("✅ Extracted image from message.image_url (string)")
                         return image_url
                 
                 # Some models return image as string content
                 if isinstance(content, str) and content.startswith("http"):
-                    print(f"✅ Extracted image from message.content (URL string)", flush=True)
+                    logger.debug("✅ Extracted image from message.content (URL string)")
                     return content
             
             # Fallback: check response data structure
             if result.get("data") and isinstance(result["data"], list) and len(result["data"]) > 0:
                 if result["data"][0].get("url"):
-                    print(f"✅ Extracted image from data[0].url", flush=True)
+                    logger.debug("✅ Extracted image from data[0].url")
                     return result["data"][0]["url"]
             
-            print(f"❌ No image found in OpenRouter response", flush=True)
-            print(f"   Response structure: {json.dumps(result, indent=2)[:500]}...", flush=True)
+            logger.error("❌ No image found in OpenRouter response")
+            logger.error("   Response structure: %s...", json.dumps(result, indent=2)[:500])
             raise ValueError("No image URL found in OpenRouter response")
             
-        except requests.exceptions.RequestException as e:
-            print(f"❌ OpenRouter API request error for model {model}:", flush=True)
-            print(f"   Error: {str(e)}", flush=True)
-            if hasattr(e, 'response') and e.response is not None:
+        except httpx.HTTPError as e:
+            logger.error("❌ OpenRouter API request error for model %s:", model)
+            logger.error("   Error: %s", str(e))
+            if isinstance(e, httpx.HTTPStatusError):
                 try:
                     error_data = e.response.json()
-                    print(f"   Response: {json.dumps(error_data, indent=2)}", flush=True)
+                    logger.error("   Response: %s", json.dumps(error_data, indent=2))
                 except:
-                    print(f"   Response text: {e.response.text[:500]}", flush=True)
+                    logger.error("   Response text: %s", e.response.text[:500])
             raise ValueError(f"OpenRouter image generation failed: {str(e)}")
         except Exception as e:
-            print(f"❌ OpenRouter API error for model {model}:", flush=True)
-            print(f"   Error: {str(e)}", flush=True)
+            logger.error("❌ OpenRouter API error for model %s:", model)
+            logger.error("   Error: %s", str(e))
             raise ValueError(f"OpenRouter image generation failed: {str(e)}")
     
     async def _upload_image_to_s3(self, image_data: str, slide_number: int, topic: str) -> str:
@@ -352,13 +365,13 @@ class ImageAgent(Agent):
                 try:
                     image_bytes = base64.b64decode(encoded)
                 except Exception as e:
-                    print(f"❌ Failed to decode base64 image data: {e}", flush=True)
+                    logger.error("❌ Failed to decode base64 image data: %s", e)
                     raise
             
             # Handle regular URL - download the image
             elif image_data.startswith('http://') or image_data.startswith('https://'):
                 try:
-                    response = requests.get(image_data, timeout=30)
+                    response = await get_http_client().get(image_data, timeout=30, follow_redirects=True)
                     response.raise_for_status()
                     image_bytes = response.content
                     # Try to determine content type from response headers
@@ -366,7 +379,7 @@ class ImageAgent(Agent):
                     if content_type_header.startswith('image/'):
                         content_type = content_type_header
                 except Exception as e:
-                    print(f"❌ Failed to download image from URL: {e}", flush=True)
+                    logger.error("❌ Failed to download image from URL: %s", e)
                     raise
             
             # Handle raw base64 string (without data: prefix)
@@ -383,11 +396,11 @@ class ImageAgent(Agent):
                         
                         image_bytes = base64.b64decode(image_data, validate=True)
                     except Exception as e:
-                        print(f"❌ Failed to decode base64 string: {e}", flush=True)
-                        print(f"   Attempting to download as URL instead...", flush=True)
+                        logger.error("❌ Failed to decode base64 string: %s", e)
+                        logger.warning("   Attempting to download as URL instead...")
                         # If it's not base64, treat as URL and try to download
                         try:
-                            response = requests.get(image_data, timeout=30)
+                            response = await get_http_client().get(image_data, timeout=30, follow_redirects=True)
                             response.raise_for_status()
                             image_bytes = response.content
                         except:
@@ -395,7 +408,7 @@ class ImageAgent(Agent):
                 else:
                     # Doesn't look like base64, try as URL
                     try:
-                        response = requests.get(image_data, timeout=30)
+                        response = await get_http_client().get(image_data, timeout=30, follow_redirects=True)
                         response.raise_for_status()
                         image_bytes = response.content
                     except:
@@ -421,8 +434,10 @@ class ImageAgent(Agent):
         
         # Upload to S3
         # Note: Public access is controlled by bucket policy, not ACLs
+        # boto3 is blocking - run it in a worker thread so the shared event loop keeps serving other requests
         try:
-            self.s3_client.put_object(
+            await asyncio.to_thread(
+                self.s3_client.put_object,
                 Bucket=self.s3_bucket,
                 Key=s3_key,
                 Body=image_bytes,
@@ -430,14 +445,11 @@ class ImageAgent(Agent):
             )
             
             # Generate public URL
-            if self.s3_region == 'us-east-1':
-                url = f"https://{self.s3_bucket}.s3.amazonaws.com/{s3_key}"
-            else:
-                url = f"https://{self.s3_bucket}.s3.{self.s3_region}.amazonaws.com/{s3_key}"
+            url = f"{self._s3_url_prefix}/{s3_key}"
             
-            print(f"✅ Uploaded image to S3: {url}", flush=True)
+            logger.debug("✅ Uploaded image to S3: %s", url)
             return url
         except ClientError as e:
-            print(f"❌ S3 upload error: {e}", flush=True)
+            logger.error("❌ S3 upload error: %s", e)
             raise
 
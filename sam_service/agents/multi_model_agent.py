@@ -3,10 +3,23 @@ Multi-Model Agent Base Class
 All models go through Backboard.io - just change the model name
 """
 import json
+import logging
 import os
 from typing import Dict, Any, Optional
 from abc import ABC, abstractmethod
 from .backboard_service import get_backboard_service
+# Import sentry_helper - try relative import first, then absolute
+try:
+    from ..sentry_helper import add_agent_breadcrumb
+except ImportError:
+    # Fallback for when running directly (not as package)
+    import sys
+    parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if parent_dir not in sys.path:
+        sys.path.insert(0, parent_dir)
+    from sentry_helper import add_agent_breadcrumb
+
+logger = logging.getLogger(__name__)
 
 class MultiModelAgent(ABC):
     """Base class for agents that support multiple model providers via Backboard.io"""
@@ -37,24 +50,12 @@ class MultiModelAgent(ABC):
                 stream=False
             )
         except Exception as e:
-            print(f"❌ Backboard.io API error for model {model_name}:", flush=True)
-            print(f"   Error: {str(e)}", flush=True)
+            logger.error("❌ Backboard.io API error for model %s:", model_name)
+            logger.error("   Error: %s", str(e))
             raise ValueError(f"Backboard.io generation failed: {str(e)}")
     
     async def call_llm(self, provider: str, prompt: str, system_prompt: str = None, model: str = None) -> str:
         """Call the appropriate LLM via Backboard.io - all models go through Backboard.io"""
-        # Import sentry_helper - try relative import first, then absolute
-        try:
-            from ..sentry_helper import measure_latency, add_agent_breadcrumb
-        except ImportError:
-            # Fallback for when running directly (not as package)
-            import sys
-            import os
-            parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-            if parent_dir not in sys.path:
-                sys.path.insert(0, parent_dir)
-            from sentry_helper import measure_latency, add_agent_breadcrumb
-        
         # Track LLM call
         add_agent_breadcrumb(
             message=f"Calling LLM: {provider}/{model}",
@@ -112,6 +113,6 @@ class MultiModelAgent(ABC):
         
         # Log mapping if changed
         if model_name != (model or 'gpt-4o') or llm_provider != provider:
-            print(f"ℹ️ Mapping model '{model or 'default'}' (provider: {provider}) to '{model_name}' (provider: {llm_provider}) for Backboard.io", flush=True)
+            logger.debug("ℹ️ Mapping model '%s' (provider: %s) to '%s' (provider: %s) for Backboard.io", model or 'default', provider, model_name, llm_provider)
         
         return await self.generate_with_backboard(prompt, system_prompt, llm_provider, model_name)
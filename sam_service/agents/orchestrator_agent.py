@@ -33,6 +33,18 @@ class OrchestratorAgent(Agent, MultiModelAgent):
         {'provider': 'anthropic', 'model': 'claude-3-7-sonnet-20250219', 'name': 'Anthropic Claude 3.7 Sonnet', 'uses_credits': True},
     ]
     
+    # First supported model per provider (the default when no model is given)
+    _MODELS_BY_PROVIDER = {m['provider']: m for m in reversed(SUPPORTED_MODELS)}
+    
+    # Task type -> agent that handles it
+    TASK_AGENTS = {
+        'script.lesson': 'script_agent',
+        'image.slide': 'image_agent',
+        'speech.slide': 'speech_agent',
+        'quiz.prompt': 'quiz_prompt_agent',
+        'quiz.questions': 'quiz_questions_agent',
+    }
+    
     def __init__(self):
         MultiModelAgent.__init__(self, "orchestrator", ['google', 'openai', 'anthropic'])
         Agent.__init__(
@@ -72,47 +84,22 @@ class OrchestratorAgent(Agent, MultiModelAgent):
         Returns:
             Routing decision and metadata
         """
-        routing_prompt = f"""Based on the task type "{task_type}" and parameters, determine:
-1. Which agent should handle this task
-2. What parameters to pass to that agent
-3. Whether to use model comparison mode
-
-Task Type: {task_type}
-Parameters: {params}
-
-Respond with JSON:
-{{
-  "agent": "agent_name",
-  "params": {{}},
-  "compare_models": false
-}}"""
-
-        model_config = next((m for m in self.SUPPORTED_MODELS if m['provider'] == provider), None)
+        model_config = self._MODELS_BY_PROVIDER.get(provider)
         if not model_config:
             raise ValueError(f"Unsupported provider: {provider}")
         
-        model_name = model or model_config['model']
-        system_prompt = """You are the orchestrator for the UOttaHack learning platform. 
-        Route tasks to the appropriate specialized agents."""
-        
         # For now, return simple routing (can be enhanced with LLM-based routing)
-        routing_map = {
-            'script.lesson': {'agent': 'script_agent', 'params': params},
-            'image.slide': {'agent': 'image_agent', 'params': params},
-            'speech.slide': {'agent': 'speech_agent', 'params': params},
-            'quiz.prompt': {'agent': 'quiz_prompt_agent', 'params': params},
-            'quiz.questions': {'agent': 'quiz_questions_agent', 'params': params},
-        }
+        agent_name = self.TASK_AGENTS.get(task_type)
+        if agent_name is None:
+            raise ValueError(f"Unknown task type: {task_type}")
         
-        if task_type in routing_map:
-            return {
-                **routing_map[task_type],
-                '_metadata': {
-                    'provider': provider,
-                    'model': model_name,
-                    'model_name': model_config['name']
-                }
+        return {
+            'agent': agent_name,
+            'params': params,
+            '_metadata': {
+                'provider': provider,
+                'model': model or model_config['model'],
+                'model_name': model_config['name']
             }
-        else:
-            raise ValueError(f"Unknown task type: {task_type}")
+        }
 
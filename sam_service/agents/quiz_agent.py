@@ -3,8 +3,28 @@ Quiz Generation Agents for Solace Agent Mesh
 Generates quiz prompts and questions
 Supports multiple AI providers for comparison
 """
-import json
+import logging
+import orjson
 from typing import Dict, Any, List, Optional
+# Import sentry_helper - try relative import first, then absolute
+try:
+    from ..sentry_helper import (
+        capture_agent_error,
+        add_agent_breadcrumb,
+        set_agent_context
+    )
+except ImportError:
+    # Fallback for when running directly (not as package)
+    import sys
+    import os
+    parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if parent_dir not in sys.path:
+        sys.path.insert(0, parent_dir)
+    from sentry_helper import (
+        capture_agent_error,
+        add_agent_breadcrumb,
+        set_agent_context
+    )
 # TODO: Fix Agent import - solace_agent_mesh package API differs
 # Simple Agent base class for compatibility
 class Agent:
@@ -23,6 +43,8 @@ class Tool:
     pass
 from .multi_model_agent import MultiModelAgent
 
+logger = logging.getLogger(__name__)
+
 class QuizPromptAgent(Agent, MultiModelAgent):
     """Agent that generates quiz prompts with multiple model support"""
     
@@ -156,26 +178,6 @@ Format your response as JSON with this structure:
 }}
 YOU MUST HAVE {num_questions} QESTIONS AND ANSWERS!"""
 
-        # Import sentry_helper for tracking
-        try:
-            from ..sentry_helper import (
-                capture_agent_error,
-                add_agent_breadcrumb,
-                set_agent_context
-            )
-        except ImportError:
-            # Fallback for when running directly (not as package)
-            import sys
-            import os
-            parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-            if parent_dir not in sys.path:
-                sys.path.insert(0, parent_dir)
-            from sentry_helper import (
-                capture_agent_error,
-                add_agent_breadcrumb,
-                set_agent_context
-            )
-        
         # Set Sentry context
         set_agent_context('quiz_questions_agent', 'quiz_questions', provider, model_name)
         
@@ -192,7 +194,7 @@ YOU MUST HAVE {num_questions} QESTIONS AND ANSWERS!"""
                 json_end = content.find("```", json_start)
                 content = content[json_start:json_end].strip()
             
-            result = json.loads(content)
+            result = orjson.loads(content)
             
             # Validate number of questions
             questions = result.get('questions', [])
@@ -224,7 +226,7 @@ YOU MUST HAVE {num_questions} QESTIONS AND ANSWERS!"""
                     actual=actual_count
                 )
                 
-                print(f"❌ Quiz question count mismatch: requested {num_questions}, got {actual_count}", flush=True)
+                logger.error("❌ Quiz question count mismatch: requested %s, got %s", num_questions, actual_count)
             
             result['_metadata'] = {
                 'provider': provider,
@@ -235,18 +237,8 @@ YOU MUST HAVE {num_questions} QESTIONS AND ANSWERS!"""
                 'question_count_match': actual_count == num_questions
             }
             return result
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             # Capture JSON parsing error
-            try:
-                from ..sentry_helper import capture_agent_error
-            except ImportError:
-                import sys
-                import os
-                parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-                if parent_dir not in sys.path:
-                    sys.path.insert(0, parent_dir)
-                from sentry_helper import capture_agent_error
-            
             capture_agent_error(
                 error=e,
                 agent_name='quiz_questions_agent',
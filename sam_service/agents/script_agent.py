@@ -4,7 +4,8 @@ Generates lesson scripts divided into slides
 Supports multiple AI providers for comparison
 Handles messages from Solace event mesh topics
 """
-import json
+import orjson
+import logging
 from datetime import datetime
 from typing import Dict, Any, Optional
 # Import sentry_helper - try relative import first, then absolute
@@ -53,6 +54,40 @@ class Tool:
     pass
 from .multi_model_agent import MultiModelAgent
 
+logger = logging.getLogger(__name__)
+
+# Prompt pieces are built once; only topic/length/slide count vary per request.
+# The JSON schema is appended verbatim so it needs no brace escaping.
+_LESSON_PROMPT_TEMPLATE = """Create an educational lesson script about "{topic}" that is approximately {length_minutes} minutes long when spoken.
+
+Break the script into {num_slides} slides (approximately 2 minutes per slide).
+
+For each slide, provide:
+1. A clear, engaging script that can be read aloud
+2. Content that is educational and appropriate for students
+3. Smooth transitions between slides
+
+"""
+
+_LESSON_JSON_SCHEMA = """Format your response as JSON:
+{
+  "script": "Full script text here",
+  "slides": [
+    {
+      "slideNumber": 1,
+      "script": "Script content for slide 1"
+    },
+    {
+      "slideNumber": 2,
+      "script": "Script content for slide 2"
+    }
+  ]
+}"""
+
+_LESSON_SYSTEM_PROMPT = """You are an expert educational content creator. 
+        Generate engaging, educational lesson scripts that are well-structured 
+        and appropriate for classroom use."""
+
 class ScriptAgent(Agent, MultiModelAgent):
     """Agent that generates educational lesson scripts with multiple model support"""
     
@@ -69,6 +104,11 @@ class ScriptAgent(Agent, MultiModelAgent):
         {'provider': 'anthropic', 'model': 'claude-3-7-sonnet-20250219', 'name': 'Anthropic Claude 3.7 Sonnet', 'uses_credits': True},
     ]
     
+    # Default model config per provider (first listed model wins, like the old next(...) scans)
+    _MODELS_BY_PROVIDER = {m['provider']: m for m in reversed(SUPPORTED_MODELS)}
+    # Exact (provider, model) config so metadata names the model that was actually used
+    _MODELS_BY_KEY = {(m['provider'], m['model']): m for m in SUPPORTED_MODELS}
+    
     def __init__(self):
         MultiModelAgent.__init__(self, "script_agent", ['google', 'openai', 'anthropic'])
         Agent.__init__(
@@ -121,17 +161,12 @@ class ScriptAgent(Agent, MultiModelAgent):
             )
             
             # Add tracking metadata to response
+            cfg = self._MODELS_BY_KEY.get((provider, model)) or self._MODELS_BY_PROVIDER.get(provider)
             result["_metadata"] = {
                 "agent": "script_agent",
                 "provider": provider,
-                "model": model or next(
-                    (m['model'] for m in self.SUPPORTED_MODELS if m['provider'] == provider),
-                    'google/gemini-2.5-flash-lite'
-                ),
-                "model_name": next(
-                    (m['name'] for m in self.SUPPORTED_MODELS if m['provider'] == provider),
-                    'Google Gemini Pro'
-                ),
+                "model": model or (cfg['model'] if cfg else 'google/gemini-2.5-flash-lite'),
+                "model_name": cfg['name'] if cfg else 'Google Gemini Pro',
                 "request_id": request_id,
                 "group_number": group_number,
                 "processed_at": datetime.now().isoformat(),
@@ -169,10 +204,8 @@ class ScriptAgent(Agent, MultiModelAgent):
             Dictionary with script and slides
         """
         # Set Sentry context
-        model_name = model or next(
-            (m['model'] for m in self.SUPPORTED_MODELS if m['provider'] == provider),
-            'gemini-2.5-flash-lite'
-        )
+        model_config = self._MODELS_BY_PROVIDER.get(provider)
+        model_name = model or (model_config['model'] if model_config else 'gemini-2.5-flash-lite')
         set_agent_context('script_agent', 'lesson_script', provider, model_name)
         
         add_agent_breadcrumb(
@@ -187,44 +220,22 @@ class ScriptAgent(Agent, MultiModelAgent):
         
         num_slides = max(3, length_minutes // 2)
         
-        prompt = f"""Create an educational lesson script about "{topic}" that is approximately {length_minutes} minutes long when spoken.
-
-Break the script into {num_slides} slides (approximately 2 minutes per slide).
-
-For each slide, provide:
-1. A clear, engaging script that can be read aloud
-2. Content that is educational and appropriate for students
-3. Smooth transitions between slides
-
-Format your response as JSON:
-{{
-  "script": "Full script text here",
-  "slides": [
-    {{
-      "slideNumber": 1,
-      "script": "Script content for slide 1"
-    }},
-    {{
-      "slideNumber": 2,
-      "script": "Script content for slide 2"
-    }}
-  ]
-}}"""
+        prompt = _LESSON_PROMPT_TEMPLATE.format_map({
+            "topic": topic,
+            "length_minutes": length_minutes,
+            "num_slides": num_slides
+        }) + _LESSON_JSON_SCHEMA
 
         # Determine model to use
-        model_config = next((m for m in self.SUPPORTED_MODELS if m['provider'] == provider), None)
         if not model_config:
             raise ValueError(f"Unsupported provider: {provider}")
         
         model_name = model or model_config['model']
-        system_prompt = """You are an expert educational content creator. 
-        Generate engaging, educational lesson scripts that are well-structured 
-        and appropriate for classroom use."""
         
         # Use the specified provider to generate the script with latency tracking
         try:
             with measure_latency("backboard_api_call"):
-                content = await self.call_llm(provider, prompt, system_prompt, model_name)
+                content = await self.call_llm(provider, prompt, _LESSON_SYSTEM_PROMPT, model_name)
             
             add_agent_breadcrumb(
                 message="Script generation API call completed",
@@ -235,17 +246,26 @@ Format your response as JSON:
             
             # Parse JSON response
             try:
-                # Extract JSON from markdown code blocks if present
-                if "```json" in content:
-                    json_start = content.find("```json") + 7
-                    json_end = content.find("```", json_start)
-                    content = content[json_start:json_end].strip()
-                elif "```" in content:
-                    json_start = content.find("```") + 3
-                    json_end = content.find("```", json_start)
-                    content = content[json_start:json_end].strip()
+                result = None
+                if content.lstrip()[:1] in ('{', '['):
+                    # Bare JSON reply - skip the markdown fence scans entirely
+                    try:
+                        result = orjson.loads(content)
+                    except orjson.JSONDecodeError:
+                        pass
                 
-                result = json.loads(content)
+                if result is None:
+                    # Extract JSON from markdown code blocks if present
+                    if "```json" in content:
+                        json_start = content.find("```json") + 7
+                        json_end = content.find("```", json_start)
+                        content = content[json_start:json_end].strip()
+                    elif "```" in content:
+                        json_start = content.find("```") + 3
+                        json_end = content.find("```", json_start)
+                        content = content[json_start:json_end].strip()
+                    
+                    result = orjson.loads(content)
                 result['_metadata'] = {
                     'provider': provider,
                     'model': model_name,
@@ -260,7 +280,7 @@ Format your response as JSON:
                 )
                 
                 return result
-            except json.JSONDecodeError as e:
+            except orjson.JSONDecodeError as e:
                 capture_agent_error(
                     error=e,
                     agent_name='script_agent',
@@ -270,9 +290,9 @@ Format your response as JSON:
                     model=model_name,
                     response_preview=content[:200] if content else None
                 )
-                print(f"❌ JSON parsing error: {str(e)}", flush=True)
+                logger.error("❌ JSON parsing error: %s", str(e))
                 if content:
-                    print(f"   Response text: {content[:500]}", flush=True)
+                    logger.error("   Response text: %s", content[:500])
                 raise ValueError(f"Failed to parse script response as JSON: {str(e)}")
         except Exception as e:
             capture_agent_error(
@@ -285,7 +305,7 @@ Format your response as JSON:
                 topic_length=len(topic)
             )
             raise
-        except json.JSONDecodeError:
+        except orjson.JSONDecodeError:
             # Fallback if JSON parsing fails
             return {
                 "script": content,
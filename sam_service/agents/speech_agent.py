@@ -20,11 +20,47 @@ class Agent:
 class Tool:
     pass
 import os
-import requests
+import asyncio
+import concurrent.futures
+import io
+import itertools
+import logging
+import orjson
 import time
 import pathlib
 import boto3
+from boto3.exceptions import S3UploadFailedError
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 from botocore.exceptions import ClientError
+from .http_client import post_with_retry
+
+logger = logging.getLogger(__name__)
+
+# Long lessons produce multi-MB MP3s; split them into parallel multipart uploads
+S3_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=8 * 1024 * 1024,
+    multipart_chunksize=8 * 1024 * 1024,
+    max_concurrency=8,
+    use_threads=True
+)
+
+# Bounded pool for the blocking upload/file write so concurrent slides overlap
+_TTS_EXECUTOR = concurrent.futures.ThreadPoolExecutor(max_workers=8, thread_name_prefix="tts")
+
+# Speech filenames only need to be unique, so draw randomness once per process and
+# count from there instead of reading os.urandom for every file
+_FILE_ID_PREFIX = os.urandom(4).hex()
+_file_ids = itertools.count()
+
+def _reset_file_ids():
+    """Give forked workers their own prefix so they never reuse the parent's names"""
+    global _FILE_ID_PREFIX, _file_ids
+    _FILE_ID_PREFIX = os.urandom(4).hex()
+    _file_ids = itertools.count()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_file_ids)
 
 class SpeechAgent(Agent):
     """Agent that generates speech from text"""
@@ -41,20 +77,41 @@ class SpeechAgent(Agent):
         self.voice_id = os.getenv("ELEVENLABS_VOICE_ID", "21m00Tcm4TlvDq8ikWAM")
         self.base_url = "https://api.elevenlabs.io/v1"
         
+        # Only the text changes per request; headers and voice settings are fixed
+        self._tts_headers = {
+            "Accept": "audio/mpeg",
+            "Content-Type": "application/json"
+        }
+        # httpx rejects None header values; without a key ElevenLabs answers 401 like before
+        if self.api_key:
+            self._tts_headers["xi-api-key"] = self.api_key
+        self._tts_body_template = {
+            "model_id": "eleven_monolingual_v1",
+            "voice_settings": {
+                "stability": 0.5,
+                "similarity_boost": 0.75,
+                "style": 0.0,
+                "use_speaker_boost": True
+            }
+        }
+        
         # S3 configuration
         self.use_s3 = os.getenv("USE_S3", "false").lower() == "true"
         self.s3_bucket = os.getenv("AWS_S3_BUCKET")
         self.s3_region = os.getenv("AWS_REGION", "us-east-1")
         self.aws_access_key_id = os.getenv("AWS_ACCESS_KEY_ID")
         self.aws_secret_access_key = os.getenv("AWS_SECRET_ACCESS_KEY")
+        # Transfer Acceleration must also be enabled on the bucket itself
+        self.s3_accelerate = os.getenv("AWS_S3_ACCELERATE", "false").lower() == "true"
         
         # Debug S3 configuration
-        print(f"🔍 S3 Configuration Check:", flush=True)
-        print(f"   USE_S3: {self.use_s3}", flush=True)
-        print(f"   AWS_S3_BUCKET: {self.s3_bucket if self.s3_bucket else 'NOT SET'}", flush=True)
-        print(f"   AWS_REGION: {self.s3_region}", flush=True)
-        print(f"   AWS_ACCESS_KEY_ID: {'SET' if self.aws_access_key_id else 'NOT SET'}", flush=True)
-        print(f"   AWS_SECRET_ACCESS_KEY: {'SET' if self.aws_secret_access_key else 'NOT SET'}", flush=True)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("🔍 S3 Configuration Check:")
+            logger.info("   USE_S3: %s", self.use_s3)
+            logger.info("   AWS_S3_BUCKET: %s", self.s3_bucket if self.s3_bucket else 'NOT SET')
+            logger.info("   AWS_REGION: %s", self.s3_region)
+            logger.info("   AWS_ACCESS_KEY_ID: %s", 'SET' if self.aws_access_key_id else 'NOT SET')
+            logger.info("   AWS_SECRET_ACCESS_KEY: %s", 'SET' if self.aws_secret_access_key else 'NOT SET')
         
         # Initialize S3 client if configured
         self.s3_client = None
@@ -64,19 +121,32 @@ class SpeechAgent(Agent):
                     's3',
                     region_name=self.s3_region,
                     aws_access_key_id=self.aws_access_key_id,
-                    aws_secret_access_key=self.aws_secret_access_key
+                    aws_secret_access_key=self.aws_secret_access_key,
+                    config=Config(s3={"use_accelerate_endpoint": self.s3_accelerate})
                 )
+                # Public object URL prefix never changes, so build it once
+                if self.s3_region == 'us-east-1':
+                    self._s3_url_prefix = f"https://{self.s3_bucket}.s3.amazonaws.com"
+                else:
+                    self._s3_url_prefix = f"https://{self.s3_bucket}.s3.{self.s3_region}.amazonaws.com"
                 # Test S3 connection by listing bucket (optional, can be removed)
-                print(f"✅ S3 client initialized for bucket: {self.s3_bucket}", flush=True)
+                logger.info("✅ S3 client initialized for bucket: %s", self.s3_bucket)
             except Exception as e:
-                print(f"❌ Failed to initialize S3 client: {e}", flush=True)
-                print("⚠️ Falling back to local storage", flush=True)
+                logger.error("❌ Failed to initialize S3 client: %s", e)
+                logger.warning("⚠️ Falling back to local storage")
                 self.use_s3 = False
         elif self.use_s3:
-            print("⚠️ S3 enabled but missing required configuration. Falling back to local storage.", flush=True)
-            print("   Required: AWS_S3_BUCKET, AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY", flush=True)
+            logger.warning("⚠️ S3 enabled but missing required configuration. Falling back to local storage.")
+            logger.warning("   Required: AWS_S3_BUCKET, AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY")
             self.use_s3 = False
         
+        # Local fallback directory (Node.js server serves /uploads/ statically)
+        current_file = pathlib.Path(__file__).resolve()
+        sam_service_dir = current_file.parent.parent  # Go up from agents/ to sam_service/
+        project_root = sam_service_dir.parent  # Go up from sam_service/ to project root
+        self._uploads_dir = project_root / "server" / "uploads"
+        self._uploads_dir.mkdir(parents=True, exist_ok=True)
+        
         # Register tool
         self.register_tool(self.generate_speech)
     
@@ -93,33 +163,27 @@ class SpeechAgent(Agent):
         """
         voice = voice_id or self.voice_id
         
-        response = requests.post(
+        # Shared pooled HTTP/2 client; 429/5xx responses are retried with backoff
+        response = await post_with_retry(
             f"{self.base_url}/text-to-speech/{voice}",
-            headers={
-                "Accept": "audio/mpeg",
-                "Content-Type": "application/json",
-                "xi-api-key": self.api_key
-            },
-            json={
-                "text": text,
-                "model_id": "eleven_monolingual_v1",
-                "voice_settings": {
-                    "stability": 0.5,
-                    "similarity_boost": 0.75,
-                    "style": 0.0,
-                    "use_speaker_boost": True
-                }
-            },
+            headers=self._tts_headers,
+            content=orjson.dumps({**self._tts_body_template, "text": text}),
             timeout=120
         )
         response.raise_for_status()
         
-        timestamp = int(time.time() * 1000)
-        filename = f"speech_{timestamp}.mp3"
+        # boto3 and file I/O block, so run them off the event loop
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_TTS_EXECUTOR, self._store_speech_sync, response.content)
+    
+    def _store_speech_sync(self, audio: bytes) -> str:
+        """Upload audio to S3 (or save locally), executed on the TTS thread pool"""
+        # Per-process prefix + counter keeps slides that finish in the same millisecond from colliding
+        filename = f"speech_{time.time_ns() // 1_000_000}_{_FILE_ID_PREFIX}{next(_file_ids)}.mp3"
         
         # Debug: Log S3 status before upload attempt
-        print(f"🔍 Attempting to upload speech file: {filename}", flush=True)
-        print(f"   use_s3: {self.use_s3}, s3_client: {self.s3_client is not None}", flush=True)
+        logger.debug("🔍 Attempting to upload speech file: %s (use_s3: %s, s3_client: %s)",
+                     filename, self.use_s3, self.s3_client is not None)
         
         # Upload to S3 if configured, otherwise save locally
         if self.use_s3 and self.s3_client:
@@ -127,42 +191,35 @@ class SpeechAgent(Agent):
                 # Upload to S3
                 # Note: Public access is controlled by bucket policy, not ACLs
                 s3_key = f"speech/{filename}"
-                self.s3_client.put_object(
-                    Bucket=self.s3_bucket,
-                    Key=s3_key,
-                    Body=response.content,
-                    ContentType='audio/mpeg',
-                    CacheControl='public, max-age=31536000',  # Cache for 1 year
-                    ContentDisposition='inline'  # Allow inline playback
+                self.s3_client.upload_fileobj(
+                    io.BytesIO(audio),
+                    self.s3_bucket,
+                    s3_key,
+                    ExtraArgs={
+                        'ContentType': 'audio/mpeg',
+                        'CacheControl': 'public, max-age=31536000',  # Cache for 1 year
+                        'ContentDisposition': 'inline'  # Allow inline playback
+                    },
+                    Config=S3_TRANSFER_CONFIG
                 )
                 
                 # Generate public URL
-                if self.s3_region == 'us-east-1':
-                    url = f"https://{self.s3_bucket}.s3.amazonaws.com/{s3_key}"
-                else:
-                    url = f"https://{self.s3_bucket}.s3.{self.s3_region}.amazonaws.com/{s3_key}"
+                url = f"{self._s3_url_prefix}/{s3_key}"
                 
-                print(f"✅ Uploaded speech file to S3: {url}", flush=True)
+                logger.debug("✅ Uploaded speech file to S3: %s", url)
                 return url
-            except ClientError as e:
-                print(f"❌ S3 upload error: {e}", flush=True)
-                print("⚠️ Falling back to local storage", flush=True)
+            except (ClientError, S3UploadFailedError) as e:
+                logger.error("❌ S3 upload error: %s", e)
+                logger.warning("⚠️ Falling back to local storage")
                 # Fall through to local storage
         
         # Fallback to local storage
-        current_file = pathlib.Path(__file__).resolve()
-        sam_service_dir = current_file.parent.parent  # Go up from agents/ to sam_service/
-        project_root = sam_service_dir.parent  # Go up from sam_service/ to project root
-        uploads_dir = project_root / "server" / "uploads"
-        
-        # Create uploads directory if it doesn't exist
-        uploads_dir.mkdir(parents=True, exist_ok=True)
-        filepath = uploads_dir / filename
+        filepath = self._uploads_dir / filename
         
         with open(filepath, "wb") as f:
-            f.write(response.content)
+            f.write(audio)
         
-        print(f"✅ Saved speech file locally to: {filepath}", flush=True)
+        logger.debug("✅ Saved speech file locally to: %s", filepath)
         
         # Return URL path (Node.js server serves /uploads/ statically)
         return f"/uploads/{filename}"
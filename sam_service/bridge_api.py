@@ -2,35 +2,63 @@
 Bridge API between Node.js backend and Python SAM service
 Provides REST API endpoints for task execution
 """
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, redirect
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
 from dotenv import load_dotenv
+from logging_helper import setup_queued_logging
 import os
+import logging
 import asyncio
-import uuid
-import json
-from datetime import datetime
-from typing import Dict, Any, Optional
+import base64
+import functools
+import hashlib
+import atexit
+import concurrent.futures
+import threading
+from typing import Annotated, Dict, Any, Optional, Union
+from cachetools import TTLCache
+import orjson
+from pydantic import BaseModel, Field, ValidationError, field_validator
 import sentry_sdk
 from sentry_sdk.integrations.flask import FlaskIntegration
+from sentry_sdk.integrations.logging import LoggingIntegration
+
+# libuv-backed event loop for the agent calls; optional (no Windows support), falls back to asyncio's
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
 
 load_dotenv()
 
+# Agents log through the logging module; keep the console output print-like
+setup_queued_logging()
+logger = logging.getLogger(__name__)
+
 # Initialize Sentry
 SENTRY_DSN = os.getenv('SENTRY_DSN')
+TRACES_SAMPLE_RATE = float(os.getenv('SENTRY_TRACES_SAMPLE_RATE', 0.25))  # 25% sampling for successful transactions
+# Health checks and the static config/model lists aren't worth tracing
+UNTRACED_PATHS = frozenset({'/health', '/api/ai/models', '/api/ai/router/config'})
+
+def _traces_sampler(sampling_context):
+    path = sampling_context.get('wsgi_environ', {}).get('PATH_INFO')
+    return 0.0 if path in UNTRACED_PATHS else TRACES_SAMPLE_RATE
+
 if SENTRY_DSN:
     sentry_sdk.init(
         dsn=SENTRY_DSN,
-        integrations=[FlaskIntegration()],
-        traces_sample_rate=0.25,  # 25% sampling for successful transactions
+        integrations=[
+            FlaskIntegration(),
+            LoggingIntegration(level=logging.INFO, event_level=logging.ERROR)
+        ],
+        traces_sampler=_traces_sampler,
         environment=os.getenv('ENVIRONMENT', 'development'),
-        before_send=lambda event, hint: event if event.get('level') in ['error', 'fatal'] else event,
     )
-    print("✅ Sentry initialized in bridge_api.py", flush=True)
+    logger.info("✅ Sentry initialized in bridge_api.py")
 else:
-    print("⚠️ SENTRY_DSN not set - Sentry monitoring disabled", flush=True)
-
-load_dotenv()
+    logger.warning("⚠️ SENTRY_DSN not set - Sentry monitoring disabled")
 
 # Simple direct routing for agents (no Solace)
 class AgentMesh:
@@ -41,7 +69,7 @@ class AgentMesh:
     def register_agent(self, agent):
         """Register an agent with the mesh"""
         self.agents[agent.name] = agent
-        print(f"✅ Registered agent: {agent.name}")
+        logger.info("✅ Registered agent: %s", agent.name)
 
 # Import agents
 from agents.script_agent import ScriptAgent
@@ -49,88 +77,107 @@ from agents.image_agent import ImageAgent
 from agents.speech_agent import SpeechAgent
 from agents.quiz_agent import QuizPromptAgent, QuizQuestionsAgent
 from agents.orchestrator_agent import OrchestratorAgent
+from agents.http_client import get_http_client, close_http_client
 
-load_dotenv()
+class OrjsonProvider(JSONProvider):
+    """Flask JSON provider backed by orjson, used by jsonify and request.json"""
+    option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    @staticmethod
+    def _default(obj):
+        # orjson covers datetime/UUID/dataclasses natively; Decimal and the rest fall back to str
+        return str(obj)
+
+    def dumpb(self, obj) -> bytes:
+        """Serialize straight to UTF-8 bytes for bodies that never need a str"""
+        return orjson.dumps(obj, default=self._default, option=self.option)
+
+    def dumps(self, obj, **kwargs):
+        return self.dumpb(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        # Skip the bytes -> str -> bytes round trip dumps() needs for its str return type
+        obj = self._prepare_response_obj(args, kwargs)
+        body = self.dumpb(obj)
+        return self._app.response_class(body, mimetype="application/json")
 
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 CORS(app)
 
+# One long-lived event loop shared by every request, running in a daemon thread.
+# Keeps agent HTTP clients and connection pools warm and lets compare fan-outs overlap.
+_loop = uvloop.new_event_loop() if uvloop is not None else asyncio.new_event_loop()
+threading.Thread(target=_loop.run_forever, name="sam-async-loop", daemon=True).start()
+# Open the pooled httpx client the agents share on that loop now rather than on the first request
+_loop.call_soon_threadsafe(get_http_client)
+
+async def _drain_loop():
+    """Cancel leftover tasks, finalize async generators and close the shared HTTP pool"""
+    pending = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+    if pending:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+    await close_http_client()
+    await _loop.shutdown_asyncgens()
+
+@atexit.register
+def _shutdown_loop():
+    """Tear down the background loop once at interpreter exit (not per request)"""
+    if not _loop.is_running():
+        return
+    try:
+        asyncio.run_coroutine_threadsafe(_drain_loop(), _loop).result(timeout=10)
+    except Exception as e:
+        logger.warning("⚠️ Error shutting down event loop: %s", e)
+    _loop.call_soon_threadsafe(_loop.stop)
+
+async def _in_app_context(coro):
+    """Await coro with the Flask app context pushed so jsonify works on the loop thread"""
+    with app.app_context():
+        return await coro
+
 # Helper function to run async functions in Flask
-def run_async(coro):
+def run_async(coro, timeout: float = 180):
     """Run an async coroutine in Flask's sync context
-    Flask runs in multiple threads, so we always use a new thread with a new event loop
-    We need to copy Flask's application and request contexts to the new thread
+    The coroutine is scheduled on the shared background loop and the calling
+    request thread blocks until it finishes, or for at most timeout seconds.
+    Handlers read request data before calling this, so only the app context
+    needs to be carried over.
     """
-    from flask import copy_current_request_context, has_request_context
-    import concurrent.futures
-    import threading
-    
-    # Copy Flask contexts if we're in a request context
-    if has_request_context():
-        # Create a wrapper that preserves Flask contexts
-        @copy_current_request_context
-        def run_in_thread_with_context():
-            """Run the coroutine in a new event loop in a new thread with Flask contexts"""
-            # Create a completely new event loop for this thread
-            new_loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(new_loop)
-            try:
-                return new_loop.run_until_complete(coro)
-            finally:
-                # Clean up the loop
-                try:
-                    # Cancel any remaining tasks
-                    pending = asyncio.all_tasks(new_loop)
-                    for task in pending:
-                        task.cancel()
-                    # Wait for tasks to complete cancellation
-                    if pending:
-                        new_loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
-                except Exception:
-                    pass
-                finally:
-                    new_loop.close()
-        
-        run_func = run_in_thread_with_context
-    else:
-        # No request context, just run normally
-        def run_in_thread():
-            """Run the coroutine in a new event loop in a new thread"""
-            new_loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(new_loop)
-            try:
-                return new_loop.run_until_complete(coro)
-            finally:
-                try:
-                    pending = asyncio.all_tasks(new_loop)
-                    for task in pending:
-                        task.cancel()
-                    if pending:
-                        new_loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
-                except Exception:
-                    pass
-                finally:
-                    new_loop.close()
-        
-        run_func = run_in_thread
-    
+    future = asyncio.run_coroutine_threadsafe(_in_app_context(coro), _loop)
     try:
-        # Always use a thread executor since Flask is multi-threaded
-        # This ensures we don't conflict with Flask's thread-local event loops
-        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
-            future = executor.submit(run_func)
-            return future.result(timeout=180)  # 3 minute timeout
+        return future.result(timeout=timeout)
     except concurrent.futures.TimeoutError:
-        error_msg = "Async operation timed out after 180 seconds"
-        print(error_msg)
-        raise RuntimeError(error_msg)
-    except Exception as e:
-        import traceback
-        error_msg = f"Error in run_async: {e}"
-        error_trace = traceback.format_exc()
-        print(error_msg)
-        print(error_trace)
-        raise RuntimeError(f"{error_msg}\n{error_trace}") from e
+        future.cancel()
+        raise RuntimeError(f"Async operation timed out after {timeout} seconds")
+
+class AgentBusyError(RuntimeError):
+    """Raised when too many agent calls are already waiting for a free slot"""
+
+def handle_errors(view):
+    """
+    Turn any exception escaping a task endpoint into a JSON 500
+    The exception is reported to Sentry and logged with its traceback; the
+    traceback itself is not sent back to the client. Shed load (AgentBusyError)
+    becomes a 503 so clients back off and retry.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        try:
+            return view(*args, **kwargs)
+        except AgentBusyError as e:
+            logger.warning("⚠️ %s: %s", view.__name__, e)
+            return jsonify({"success": False, "error": str(e)}), 503, {"Retry-After": "5"}
+        except Exception as e:
+            sentry_sdk.capture_exception(e)
+            logger.exception("❌ Error in %s: %s", view.__name__, e)
+            return jsonify({"success": False, "error": str(e)}), 500
+    return wrapper
 
 # Initialize SAM with direct routing (no Solace)
 mesh = AgentMesh()
@@ -152,7 +199,35 @@ mesh.register_agent(quiz_questions_agent)
 orchestrator_agent = OrchestratorAgent()
 mesh.register_agent(orchestrator_agent)
 
-print("✅ All agents registered - using direct routing (no Solace)", flush=True)
+logger.info("✅ All agents registered - using direct routing (no Solace)")
+
+def _default_models(agent):
+    """Map provider -> first listed model for that provider (what the handlers fall back to)"""
+    return {m['provider']: m['model'] for m in reversed(agent.SUPPORTED_MODELS)}
+
+# Default model per provider, computed once instead of scanning SUPPORTED_MODELS per request
+SCRIPT_DEFAULT_MODEL = _default_models(script_agent)
+IMAGE_DEFAULT_MODEL = _default_models(image_agent)
+QUIZ_PROMPT_DEFAULT_MODEL = _default_models(quiz_prompt_agent)
+QUIZ_QUESTIONS_DEFAULT_MODEL = _default_models(quiz_questions_agent)
+
+# In-flight agent calls keyed by request content, so identical concurrent requests
+# (e.g. a whole class pressing "Generate" at once) share one upstream call.
+# Each entry is [task, waiter count]; the task is cancelled once every waiter has
+# left (timed out or disconnected). Only touched from the shared event loop, so
+# no locking is needed.
+_inflight: Dict[tuple, list] = {}
+
+# Completed results for repeat requests (retries, page refreshes)
+_result_cache = TTLCache(
+    maxsize=int(os.getenv('AGENT_CACHE_SIZE', 1024)),
+    ttl=int(os.getenv('AGENT_CACHE_TTL', 3600))
+)
+
+def _request_key(agent_name: str, message: Dict[str, Any]) -> tuple:
+    """Stable key for a message; group_number is only for A/B tracking and never reaches the agent"""
+    payload = {k: v for k, v in message.items() if k != "group_number"}
+    return (agent_name, orjson.dumps(payload, default=str, option=orjson.OPT_SORT_KEYS))
 
 async def call_agent_directly(
     agent_name: str,
@@ -161,570 +236,508 @@ async def call_agent_directly(
 ) -> Dict[str, Any]:
     """
     Call an agent directly without Solace event mesh
+    Concurrent calls with the same agent and message are coalesced into one.
     """
-    if agent_name not in mesh.agents:
+    if agent_name not in AGENT_DISPATCH:
         raise ValueError(f"Unknown agent: {agent_name}")
     
-    agent = mesh.agents[agent_name]
-    provider = message.get("_metadata", {}).get("provider", "anthropic")
-    model = message.get("_metadata", {}).get("model")
+    key = _request_key(agent_name, message)
+    cached = _result_cache.get(key)
+    if cached is not None:
+        return cached
     
-    # Call agent based on agent name
-    if agent_name == "script_agent":
-        result = await script_agent.generate_lesson_script(
-            message.get("topic"),
-            message.get("length_minutes"),
-            provider=provider,
-            model=model
-        )
-        if "_metadata" not in result:
-            result["_metadata"] = {}
-        result["_metadata"].update(message.get("_metadata", {}))
-        return result
-    elif agent_name == "image_agent":
-        result = await image_agent.generate_slide_image(
-            message.get("slide_script"),
-            message.get("slide_number"),
-            message.get("topic"),
-            provider=provider,
-            model=model
-        )
-        return {"imageUrl": result, "_metadata": message.get("_metadata", {})}
-    elif agent_name == "speech_agent":
-        result = await speech_agent.generate_speech(
-            message.get("text"),
-            message.get("voice_id")
-        )
-        return {"speechUrl": result, "_metadata": message.get("_metadata", {})}
-    elif agent_name == "quiz_prompt_agent":
-        result = await quiz_prompt_agent.generate_quiz_prompt(
-            message.get("topic"),
-            message.get("question_type"),
-            message.get("num_questions"),
-            provider=provider,
-            model=model
-        )
-        return {"prompt": result, "_metadata": message.get("_metadata", {})}
-    elif agent_name == "quiz_questions_agent":
-        result = await quiz_questions_agent.generate_quiz_questions(
-            message.get("quiz_prompt"),
-            message.get("topic"),
-            message.get("question_type"),
-            message.get("num_questions"),
-            provider=provider,
-            model=model
-        )
-        if "_metadata" not in result:
-            result["_metadata"] = {}
-        result["_metadata"].update(message.get("_metadata", {}))
-        return result
-    
-    raise ValueError(f"Unknown agent: {agent_name}")
+    entry = _inflight.get(key)
+    if entry is None:
+        task = asyncio.ensure_future(_dispatch_agent(agent_name, message))
+        entry = _inflight[key] = [task, 0]
+        task.add_done_callback(lambda f: _finish_call(key, f))
+    task = entry[0]
+    entry[1] += 1
+    try:
+        # Shield so one caller timing out or disconnecting doesn't cancel the call for the others
+        return await asyncio.shield(task)
+    finally:
+        entry[1] -= 1
+        if entry[1] == 0 and not task.done():
+            # Nobody is waiting any more - stop the upstream call and free its concurrency slot.
+            # Unlist it now so a new identical request starts fresh instead of joining a cancelled task.
+            if _inflight.get(key) is entry:
+                del _inflight[key]
+            task.cancel()
+
+def _finish_call(key: tuple, future: asyncio.Future):
+    """Drop a finished call from the in-flight table and cache successful results"""
+    entry = _inflight.get(key)
+    if entry is not None and entry[0] is future:
+        del _inflight[key]
+    if future.cancelled() or future.exception() is not None:
+        return
+    result = future.result()
+    # Degraded fallbacks (e.g. quiz JSON that failed to parse) should be retried, not served again
+    if result.get("_metadata", {}).get("error"):
+        return
+    # Image/speech results are cached only when they are URLs - inline base64 data URIs are too big
+    media = result.get("imageUrl") or result.get("speechUrl")
+    if isinstance(media, str) and media.startswith("data:"):
+        return
+    _result_cache[key] = result
+
+async def _call_script(message: Dict[str, Any], meta: Dict[str, Any]) -> Dict[str, Any]:
+    result = await script_agent.generate_lesson_script(
+        message.get("topic"),
+        message.get("length_minutes"),
+        provider=meta.get("provider", "anthropic"),
+        model=meta.get("model")
+    )
+    result.setdefault("_metadata", {}).update(meta)
+    return result
+
+async def _call_image(message: Dict[str, Any], meta: Dict[str, Any]) -> Dict[str, Any]:
+    result = await image_agent.generate_slide_image(
+        message.get("slide_script"),
+        message.get("slide_number"),
+        message.get("topic"),
+        provider=meta.get("provider", "anthropic"),
+        model=meta.get("model")
+    )
+    return {"imageUrl": result, "_metadata": meta}
+
+async def _call_speech(message: Dict[str, Any], meta: Dict[str, Any]) -> Dict[str, Any]:
+    result = await speech_agent.generate_speech(
+        message.get("text"),
+        message.get("voice_id")
+    )
+    return {"speechUrl": result, "_metadata": meta}
+
+async def _call_quiz_prompt(message: Dict[str, Any], meta: Dict[str, Any]) -> Dict[str, Any]:
+    result = await quiz_prompt_agent.generate_quiz_prompt(
+        message.get("topic"),
+        message.get("question_type"),
+        message.get("num_questions"),
+        provider=meta.get("provider", "anthropic"),
+        model=meta.get("model")
+    )
+    return {"prompt": result, "_metadata": meta}
+
+async def _call_quiz_questions(message: Dict[str, Any], meta: Dict[str, Any]) -> Dict[str, Any]:
+    result = await quiz_questions_agent.generate_quiz_questions(
+        message.get("quiz_prompt"),
+        message.get("topic"),
+        message.get("question_type"),
+        message.get("num_questions"),
+        provider=meta.get("provider", "anthropic"),
+        model=meta.get("model")
+    )
+    result.setdefault("_metadata", {}).update(meta)
+    return result
+
+# agent name -> coroutine that unpacks the message, calls the agent and shapes the result
+AGENT_DISPATCH = {
+    "script_agent": _call_script,
+    "image_agent": _call_image,
+    "speech_agent": _call_speech,
+    "quiz_prompt_agent": _call_quiz_prompt,
+    "quiz_questions_agent": _call_quiz_questions,
+}
+
+# Caps concurrent upstream model/TTS calls per worker so compare fan-outs from many
+# clients at once queue here instead of tripping provider rate limits
+AGENT_MAX_CONCURRENCY = int(os.getenv('AGENT_MAX_CONCURRENCY', 32))
+_agent_slots = asyncio.Semaphore(AGENT_MAX_CONCURRENCY)
+# Calls allowed to wait for a slot; past this a burst is rejected instead of piling up
+AGENT_QUEUE_SIZE = int(os.getenv('AGENT_QUEUE_SIZE', 256))
+_agent_waiting = 0
+
+async def _dispatch_agent(agent_name: str, message: Dict[str, Any]) -> Dict[str, Any]:
+    """Invoke the agent method for agent_name with the fields from message"""
+    global _agent_waiting
+    if _agent_slots.locked() and _agent_waiting >= AGENT_QUEUE_SIZE:
+        raise AgentBusyError("Too many AI requests queued, please retry shortly")
+    _agent_waiting += 1
+    try:
+        await _agent_slots.acquire()
+    finally:
+        _agent_waiting -= 1
+    try:
+        return await AGENT_DISPATCH[agent_name](message, message.get("_metadata") or {})
+    finally:
+        _agent_slots.release()
 
 
-@app.route('/health', methods=['GET'])
+async def _media_response(url: str, default_mimetype: str) -> Response:
+    """
+    Serve generated media as raw bytes instead of a URL/base64 string inside JSON
+    Hosted media (S3 or the provider) is redirected to, local speech files are
+    read from the uploads directory, and inline base64 data is decoded.
+    """
+    if url.startswith(("http://", "https://")):
+        return redirect(url)
+    if url.startswith("/uploads/"):
+        path = speech_agent._uploads_dir / url.rsplit("/", 1)[-1]
+        body = await asyncio.to_thread(path.read_bytes)
+        return Response(body, mimetype=default_mimetype)
+    mimetype = default_mimetype
+    if url.startswith("data:"):
+        header, _, url = url.partition(",")
+        mimetype = header[5:].split(";")[0] or default_mimetype
+    return Response(base64.b64decode(url), mimetype=mimetype)
+
+
+# Hit constantly by load balancers and the Node server, so the body is built once
+HEALTH_BYTES = orjson.dumps({
+    "status": "healthy",
+    "service": "sam-bridge",
+    "routing": "direct"
+})
+
+@app.route('/health', methods=['GET'], strict_slashes=False)
 def health():
     """Health check endpoint"""
-    return jsonify({
-        "status": "healthy",
-        "service": "sam-bridge",
-        "routing": "direct"
-    })
-
-
-@app.route('/api/ai/task/script/lesson', methods=['POST'])
-def generate_script():
-    """Generate lesson script via direct agent call"""
-    # Capture request data in the Flask request context
-    data = request.json
+    return Response(HEALTH_BYTES, mimetype='application/json')
+
+
+# Request bodies, validated in one pass instead of chained data.get() checks.
+# Fields use the Node server's camelCase names as aliases.
+NonEmptyStr = Annotated[str, Field(min_length=1)]
+PositiveNumber = Annotated[Union[int, float], Field(gt=0)]
+
+class TaskRequest(BaseModel):
+    """Fields every task endpoint accepts"""
+    provider: Optional[str] = None
+    model: Optional[str] = None
+    group_number: Optional[Union[int, str]] = Field(None, alias="groupNumber")  # For A/B testing tracking
+    compare: bool = False
+
+    @field_validator("compare", mode="before")
+    @classmethod
+    def _compare_truthy(cls, v):
+        # Read by truthiness like the old data.get('compare'), so null, 0 and "" mean no compare
+        return bool(v)
+
+class ScriptRequest(TaskRequest):
+    topic: NonEmptyStr
+    length_minutes: PositiveNumber = Field(alias="lengthMinutes")
+
+class ImageRequest(TaskRequest):
+    slide_script: NonEmptyStr = Field(alias="slideScript")
+    slide_number: PositiveNumber = Field(alias="slideNumber")
+    topic: NonEmptyStr
+
+class SpeechRequest(TaskRequest):
+    text: NonEmptyStr
+    voice_id: Optional[str] = Field(None, alias="voiceId")
+
+class QuizPromptRequest(TaskRequest):
+    topic: NonEmptyStr
+    question_type: NonEmptyStr = Field(alias="questionType")
+    num_questions: PositiveNumber = Field(alias="numQuestions")
+
+class QuizQuestionsRequest(QuizPromptRequest):
+    quiz_prompt: NonEmptyStr = Field(alias="quizPrompt")
+
+class OrchestrateRequest(TaskRequest):
+    task_type: NonEmptyStr = Field(alias="taskType")
+    params: Any = Field(default_factory=dict)  # Forwarded to the orchestrator as sent, null and lists included
+
+
+def _validation_error(e: ValidationError):
+    """400 response listing which request fields were missing or invalid"""
+    return jsonify({"error": "Missing required parameters", "details": e.errors(include_url=False)}), 400
+
+
+# Task endpoints that all follow the same shape: validate the request body, call one agent (or every supported model when compare=true) and
+# wrap the result as {success, data}. Each entry becomes a POST route below.
+# "timeout" is the (single model, compare) request budget in seconds.
+TASK_ENDPOINTS = [
+    {
+        "route": "/api/ai/task/script/lesson",
+        "endpoint": "generate_script",
+        "timeout": (90, 150),
+        "agent": "script_agent",
+        "request": ScriptRequest,
+        "fields": ("topic", "length_minutes"),
+        "default_provider": "anthropic",
+        "default_models": SCRIPT_DEFAULT_MODEL,
+        "fallback_model": "anthropic/claude-3-5-sonnet-20241022",
+    },
+    {
+        "route": "/api/ai/task/image/slide",
+        "endpoint": "generate_image",
+        "timeout": (120, 170),
+        "agent": "image_agent",
+        "request": ImageRequest,
+        "fields": ("slide_script", "slide_number", "topic"),
+        "default_provider": "openai",
+        "default_models": IMAGE_DEFAULT_MODEL,
+        "fallback_model": "openai/gpt-5-image",
+        # Clients sending Accept: image/* get the image itself rather than a JSON envelope
+        "media": ("image/*", "imageUrl", "image/png"),
+    },
+    {
+        "route": "/api/ai/task/speech/slide",
+        "endpoint": "generate_speech",
+        "timeout": (60, 60),
+        "agent": "speech_agent",
+        "request": SpeechRequest,
+        "fields": ("text", "voice_id"),
+        "fixed_provider": "elevenlabs",
+        "media": ("audio/*", "speechUrl", "audio/mpeg"),
+    },
+    {
+        "route": "/api/ai/task/quiz/prompt",
+        "endpoint": "generate_quiz_prompt",
+        "timeout": (60, 120),
+        "agent": "quiz_prompt_agent",
+        "request": QuizPromptRequest,
+        "fields": ("topic", "question_type", "num_questions"),
+        "default_provider": "anthropic",
+        "default_models": QUIZ_PROMPT_DEFAULT_MODEL,
+        "fallback_model": "anthropic/claude-3-5-sonnet-20241022",
+    },
+    {
+        "route": "/api/ai/task/quiz/questions",
+        "endpoint": "generate_quiz_questions",
+        "timeout": (90, 150),
+        "agent": "quiz_questions_agent",
+        "request": QuizQuestionsRequest,
+        "fields": ("quiz_prompt", "topic", "question_type", "num_questions"),
+        "default_provider": "anthropic",
+        "default_models": QUIZ_QUESTIONS_DEFAULT_MODEL,
+        "fallback_model": "anthropic/claude-3-5-sonnet-20241022",
+    },
+]
+
+
+def _read_task_fields(spec: Dict[str, Any], data: Optional[Dict[str, Any]]):
+    """Validate the body against the endpoint's request model; returns (request, agent message fields)"""
+    req = spec["request"].model_validate(data or {})
+    fields = req.model_dump(include={*spec["fields"], "group_number"})
+    return req, fields
+
+
+def _task_message(spec: Dict[str, Any], fields: Dict[str, Any], provider: str, model: Optional[str]) -> Dict[str, Any]:
+    """Build the message call_agent_directly expects for one provider/model"""
+    metadata = {"provider": provider, "agent": spec["agent"]}
+    if model is not None:
+        metadata["model"] = model
+    return {**fields, "_metadata": metadata}
+
+
+def _make_task_handler(spec: Dict[str, Any]):
+    """Create the POST view for one TASK_ENDPOINTS entry"""
+    agent_name = spec["agent"]
+    agent = mesh.agents[agent_name]
+    media = spec.get("media")
     
-    async def _generate():
+    def handler():
+        # Capture request data in the Flask request context
+        data = request.get_json(silent=True)
+        raw_media = media is not None and request.accept_mimetypes.best_match(['application/json', media[0]]) == media[0]
+        
         try:
-            topic = data.get('topic')
-            length_minutes = data.get('lengthMinutes')
-            provider = data.get('provider', 'anthropic')
-            model = data.get('model')
-            group_number = data.get('groupNumber')  # For A/B testing tracking
-            compare_models = data.get('compare', False)
-            
-            if not topic or not length_minutes:
-                return jsonify({"error": "Missing required parameters"}), 400
+            req, fields = _read_task_fields(spec, data)
+        except ValidationError as e:
+            return _validation_error(e)
         
-            if compare_models:
+        async def _generate():
+            if "fixed_provider" not in spec and req.compare:
                 # Generate with all supported models for comparison
-                results = {}
-                tasks = []
-                for model_config in script_agent.SUPPORTED_MODELS:
-                    message = {
-                        "topic": topic,
-                        "length_minutes": length_minutes,
-                        "group_number": group_number,
-                        "_metadata": {
-                            "provider": model_config['provider'],
-                            "model": model_config['model'],
-                            "agent": "script_agent"
-                        }
-                    }
-                    tasks.append(call_agent_directly("script_agent", message))
-                
-                # Wait for all responses
+                tasks = [
+                    call_agent_directly(agent_name, _task_message(spec, fields, m['provider'], m['model']))
+                    for m in agent.SUPPORTED_MODELS
+                ]
                 responses = await asyncio.gather(*tasks, return_exceptions=True)
-                for i, response in enumerate(responses):
-                    model_name = script_agent.SUPPORTED_MODELS[i]['name']
-                    if isinstance(response, Exception):
-                        results[model_name] = {"error": str(response)}
-                    else:
-                        results[model_name] = response
-                
-                return jsonify({"success": True, "data": results, "comparison": True})
-            else:
-                # Determine model name
-                model_name = model or next(
-                    (m['model'] for m in script_agent.SUPPORTED_MODELS if m['provider'] == provider),
-                    'anthropic/claude-3-5-sonnet-20241022'
-                )
-                
-                message = {
-                    "topic": topic,
-                    "length_minutes": length_minutes,
-                    "group_number": group_number,
-                    "_metadata": {
-                        "provider": provider,
-                        "model": model_name,
-                        "agent": "script_agent"
-                    }
-                }
-                
-                # Call agent directly
-                result = await call_agent_directly("script_agent", message)
-                print(f"✅ Script generation successful!")
-                print(f"   Topic: {topic}")
-                print(f"   Length: {length_minutes} minutes")
-                print(f"   Model: {model_name}")
-                print(f"   Slides: {len(result.get('slides', []))}")
-                return jsonify({"success": True, "data": result})
-        except Exception as e:
-            import traceback
-            error_msg = str(e)
-            error_trace = traceback.format_exc()
-            print(f"❌ Error in generate_script: {error_msg}")
-            print(error_trace)
-            return jsonify({"success": False, "error": error_msg, "traceback": error_trace}), 500
-    
-    try:
-        return run_async(_generate())
-    except Exception as e:
-        import traceback
-        error_msg = str(e)
-        error_trace = traceback.format_exc()
-        print(f"Error in run_async wrapper for generate_script: {error_msg}")
-        print(error_trace)
-        return jsonify({"success": False, "error": error_msg}), 500
-
-
-@app.route('/api/ai/task/image/slide', methods=['POST'])
-def generate_image():
-    """Generate slide image via direct agent call"""
-    # Capture request data in the Flask request context
-    data = request.json
-    
-    async def _generate():
-        try:
-            slide_script = data.get('slideScript')
-            slide_number = data.get('slideNumber')
-            topic = data.get('topic')
-            provider = data.get('provider', 'openai')
-            model = data.get('model')
-            group_number = data.get('groupNumber')
-            compare_models = data.get('compare', False)
-            
-            if not slide_script or not slide_number or not topic:
-                return jsonify({"error": "Missing required parameters"}), 400
-            
-            if compare_models:
                 results = {}
-                tasks = []
-                for model_config in image_agent.SUPPORTED_MODELS:
-                    message = {
-                        "slide_script": slide_script,
-                        "slide_number": slide_number,
-                        "topic": topic,
-                        "group_number": group_number,
-                        "_metadata": {
-                            "provider": model_config['provider'],
-                            "model": model_config['model'],
-                            "agent": "image_agent"
-                        }
-                    }
-                    tasks.append(call_agent_directly("image_agent", message))
-                
-                responses = await asyncio.gather(*tasks, return_exceptions=True)
-                for i, response in enumerate(responses):
-                    model_name = image_agent.SUPPORTED_MODELS[i]['name']
+                for model_config, response in zip(agent.SUPPORTED_MODELS, responses):
                     if isinstance(response, Exception):
-                        results[model_name] = {"error": str(response)}
+                        results[model_config['name']] = {"error": str(response)}
                     else:
-                        results[model_name] = response
-                
+                        results[model_config['name']] = response
                 return jsonify({"success": True, "data": results, "comparison": True})
-            else:
-                model_name = model or next(
-                    (m['model'] for m in image_agent.SUPPORTED_MODELS if m['provider'] == provider),
-                    'openai/gpt-5-image'
-                )
-                
-                message = {
-                    "slide_script": slide_script,
-                    "slide_number": slide_number,
-                    "topic": topic,
-                    "group_number": group_number,
-                    "_metadata": {
-                        "provider": provider,
-                        "model": model_name,
-                        "agent": "image_agent"
-                    }
-                }
-                
-                result = await call_agent_directly("image_agent", message)
-                print(f"✅ Image generation successful for slide {slide_number} (topic: {topic})")
-                print(f"   Model: {model_name}")
-                if isinstance(result, str) and result.startswith("data:image"):
-                    print(f"   Image URL: {result[:50]}... (base64 data)")
-                return jsonify({"success": True, "data": result})
-        except Exception as e:
-            import traceback
-            error_msg = str(e)
-            error_trace = traceback.format_exc()
-            print(f"❌ Error in generate_image: {error_msg}")
-            print(error_trace)
-            return jsonify({"success": False, "error": error_msg, "traceback": error_trace}), 500
-    
-    try:
-        return run_async(_generate())
-    except Exception as e:
-        import traceback
-        error_msg = str(e)
-        error_trace = traceback.format_exc()
-        print(f"❌ Error in run_async wrapper for generate_image: {error_msg}")
-        print(error_trace)
-        return jsonify({"success": False, "error": error_msg}), 500
-
-
-@app.route('/api/ai/task/speech/slide', methods=['POST'])
-def generate_speech():
-    """Generate speech from text via direct agent call"""
-    # Capture request data in the Flask request context
-    data = request.json
-    
-    async def _generate():
-        try:
-            text = data.get('text')
-            voice_id = data.get('voiceId')
-            group_number = data.get('groupNumber')
-            
-            if not text:
-                return jsonify({"error": "Missing required parameters"}), 400
             
-            message = {
-                "text": text,
-                "voice_id": voice_id,
-                "group_number": group_number,
-                "_metadata": {
-                    "provider": "elevenlabs",
-                    "agent": "speech_agent"
-                }
-            }
+            if "fixed_provider" in spec:
+                provider, model_name = spec["fixed_provider"], None
+            else:
+                provider = req.provider or spec["default_provider"]
+                model_name = req.model or spec["default_models"].get(provider, spec["fallback_model"])
             
-            result = await call_agent_directly("speech_agent", message)
+            result = await call_agent_directly(agent_name, _task_message(spec, fields, provider, model_name))
+            logger.debug("✅ %s succeeded (provider: %s, model: %s)", agent_name, provider, model_name)
+            if raw_media:
+                return await _media_response(result[media[1]], media[2])
             return jsonify({"success": True, "data": result})
-        except Exception as e:
-            import traceback
-            error_msg = str(e)
-            error_trace = traceback.format_exc()
-            print(f"Error in generate_script: {error_msg}")
-            print(error_trace)
-            return jsonify({"success": False, "error": error_msg, "traceback": error_trace}), 500
+        
+        return run_async(_generate(), timeout=spec["timeout"][1 if req.compare else 0])
     
-    try:
-        return run_async(_generate())
-    except Exception as e:
-        import traceback
-        error_msg = str(e)
-        error_trace = traceback.format_exc()
-        print(f"Error in run_async wrapper for generate_script: {error_msg}")
-        print(error_trace)
-        return jsonify({"success": False, "error": error_msg}), 500
+    handler.__name__ = spec["endpoint"]
+    handler.__doc__ = f"Run {agent_name} via direct agent call"
+    return handler
 
 
-@app.route('/api/ai/task/quiz/prompt', methods=['POST'])
-def generate_quiz_prompt():
-    """Generate quiz prompt via direct agent call"""
-    # Capture request data in the Flask request context
-    data = request.json
+def _make_stream_handler(spec: Dict[str, Any]):
+    """Create the server-sent events comparison view for one TASK_ENDPOINTS entry"""
+    agent_name = spec["agent"]
+    agent = mesh.agents[agent_name]
     
-    async def _generate():
+    def handler():
+        data = request.get_json(silent=True)
         try:
-            topic = data.get('topic')
-            question_type = data.get('questionType')
-            num_questions = data.get('numQuestions')
-            provider = data.get('provider', 'anthropic')
-            model = data.get('model')
-            group_number = data.get('groupNumber')
-            compare_models = data.get('compare', False)
-            
-            if not topic or not question_type or not num_questions:
-                return jsonify({"error": "Missing required parameters"}), 400
-            
-            if compare_models:
-                results = {}
-                tasks = []
-                for model_config in quiz_prompt_agent.SUPPORTED_MODELS:
-                    message = {
-                        "topic": topic,
-                        "question_type": question_type,
-                        "num_questions": num_questions,
-                        "group_number": group_number,
-                        "_metadata": {
-                            "provider": model_config['provider'],
-                            "model": model_config['model'],
-                            "agent": "quiz_prompt_agent"
-                        }
-                    }
-                    tasks.append(call_agent_directly("quiz_prompt_agent", message))
-                
-                responses = await asyncio.gather(*tasks, return_exceptions=True)
-                for i, response in enumerate(responses):
-                    model_name = quiz_prompt_agent.SUPPORTED_MODELS[i]['name']
-                    if isinstance(response, Exception):
-                        results[model_name] = {"error": str(response)}
-                    else:
-                        results[model_name] = response
-                
-                return jsonify({"success": True, "data": results, "comparison": True})
-            else:
-                model_name = model or next(
-                    (m['model'] for m in quiz_prompt_agent.SUPPORTED_MODELS if m['provider'] == provider),
-                    'anthropic/claude-3-5-sonnet-20241022'
-                )
-                
-                message = {
-                    "topic": topic,
-                    "question_type": question_type,
-                    "num_questions": num_questions,
-                    "group_number": group_number,
-                    "_metadata": {
-                        "provider": provider,
-                        "model": model_name,
-                        "agent": "quiz_prompt_agent"
-                    }
-                }
-                
-                result = await call_agent_directly("quiz_prompt_agent", message)
-                return jsonify({"success": True, "data": result})
-        except Exception as e:
-            import traceback
-            error_msg = str(e)
-            error_trace = traceback.format_exc()
-            print(f"Error in generate_script: {error_msg}")
-            print(error_trace)
-            return jsonify({"success": False, "error": error_msg, "traceback": error_trace}), 500
+            _, fields = _read_task_fields(spec, data)
+        except ValidationError as e:
+            return _validation_error(e)
+        
+        return Response(
+            _stream_comparison(
+                agent_name,
+                agent.SUPPORTED_MODELS,
+                lambda m: _task_message(spec, fields, m['provider'], m['model']),
+                timeout=spec["timeout"][1]
+            ),
+            mimetype='text/event-stream',
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
     
-    try:
-        return run_async(_generate())
-    except Exception as e:
-        import traceback
-        error_msg = str(e)
-        error_trace = traceback.format_exc()
-        print(f"Error in run_async wrapper for generate_script: {error_msg}")
-        print(error_trace)
-        return jsonify({"success": False, "error": error_msg}), 500
+    handler.__name__ = f"stream_{spec['endpoint']}"
+    handler.__doc__ = f"Compare {agent_name} across every supported model, streamed as each one completes"
+    return handler
 
 
-@app.route('/api/ai/task/quiz/questions', methods=['POST'])
-def generate_quiz_questions():
-    """Generate quiz questions via direct agent call"""
-    # Capture request data in the Flask request context
-    data = request.json
-    
-    async def _generate():
-        try:
-            quiz_prompt = data.get('quizPrompt')
-            topic = data.get('topic')
-            question_type = data.get('questionType')
-            num_questions = data.get('numQuestions')
-            provider = data.get('provider', 'anthropic')
-            model = data.get('model')
-            group_number = data.get('groupNumber')
-            compare_models = data.get('compare', False)
-            
-            if not quiz_prompt or not topic or not question_type or not num_questions:
-                return jsonify({"error": "Missing required parameters"}), 400
-            
-            if compare_models:
-                results = {}
-                tasks = []
-                for model_config in quiz_questions_agent.SUPPORTED_MODELS:
-                    message = {
-                        "quiz_prompt": quiz_prompt,
-                        "topic": topic,
-                        "question_type": question_type,
-                        "num_questions": num_questions,
-                        "group_number": group_number,
-                        "_metadata": {
-                            "provider": model_config['provider'],
-                            "model": model_config['model'],
-                            "agent": "quiz_questions_agent"
-                        }
-                    }
-                    tasks.append(call_agent_directly("quiz_questions_agent", message))
-                
-                responses = await asyncio.gather(*tasks, return_exceptions=True)
-                for i, response in enumerate(responses):
-                    model_name = quiz_questions_agent.SUPPORTED_MODELS[i]['name']
-                    if isinstance(response, Exception):
-                        results[model_name] = {"error": str(response)}
-                    else:
-                        results[model_name] = response
-                
-                return jsonify({"success": True, "data": results, "comparison": True})
-            else:
-                model_name = model or next(
-                    (m['model'] for m in quiz_questions_agent.SUPPORTED_MODELS if m['provider'] == provider),
-                    'anthropic/claude-3-5-sonnet-20241022'
-                )
-                
-                message = {
-                    "quiz_prompt": quiz_prompt,
-                    "topic": topic,
-                    "question_type": question_type,
-                    "num_questions": num_questions,
-                    "group_number": group_number,
-                    "_metadata": {
-                        "provider": provider,
-                        "model": model_name,
-                        "agent": "quiz_questions_agent"
-                    }
-                }
-                
-                result = await call_agent_directly("quiz_questions_agent", message)
-                return jsonify({"success": True, "data": result})
-        except Exception as e:
-            import traceback
-            error_msg = str(e)
-            error_trace = traceback.format_exc()
-            print(f"Error in generate_script: {error_msg}")
-            print(error_trace)
-            return jsonify({"success": False, "error": error_msg, "traceback": error_trace}), 500
-    
+def _stream_comparison(agent_name: str, models, build_message, timeout: float = 180):
+    """
+    Server-sent events for a compare request: one event per model as soon as it finishes
+    Each agent call is scheduled on the shared loop up front; the response thread
+    then yields results in completion order instead of waiting for the slowest model.
+    """
+    futures = {
+        asyncio.run_coroutine_threadsafe(call_agent_directly(agent_name, build_message(model_config)), _loop): model_config
+        for model_config in models
+    }
     try:
-        return run_async(_generate())
-    except Exception as e:
-        import traceback
-        error_msg = str(e)
-        error_trace = traceback.format_exc()
-        print(f"Error in run_async wrapper for generate_script: {error_msg}")
-        print(error_trace)
-        return jsonify({"success": False, "error": error_msg}), 500
+        for future in concurrent.futures.as_completed(futures, timeout=timeout):
+            model_name = futures[future]['name']
+            try:
+                event = {"model": model_name, "data": future.result()}
+            except Exception as e:
+                event = {"model": model_name, "error": str(e)}
+            # Frames are built as bytes so orjson output goes out without a str round trip
+            yield b"data: " + app.json.dumpb(event) + b"\n\n"
+    except concurrent.futures.TimeoutError:
+        yield b"event: error\ndata: " + app.json.dumpb({'error': f'Comparison timed out after {timeout} seconds'}) + b"\n\n"
+    finally:
+        # Drop this stream's waits on client disconnect or timeout; call_agent_directly
+        # cancels the upstream call (freeing its slot) once no other request is waiting on it
+        for future in futures:
+            future.cancel()
+    yield b"event: done\ndata: {}\n\n"
+
+
+for _spec in TASK_ENDPOINTS:
+    app.add_url_rule(_spec["route"], view_func=handle_errors(_make_task_handler(_spec)), methods=['POST'])
+    if "fixed_provider" not in _spec:
+        app.add_url_rule(f"{_spec['route']}/stream", view_func=handle_errors(_make_stream_handler(_spec)), methods=['POST'])
+
+
+# Routing config and model lists only change on restart, so serialize them once
+ROUTING_CONFIG = {
+    "routingConfig": {
+        "script.lesson": {
+            "models": script_agent.SUPPORTED_MODELS,
+            "default": os.getenv("SCRIPT_GEN_PROVIDER", "anthropic")
+        },
+        "image.slide": {
+            "models": image_agent.SUPPORTED_MODELS,
+            "default": os.getenv("IMAGE_GEN_PROVIDER", "openai")
+        },
+        "speech.slide": {
+            "models": [{"provider": "elevenlabs", "model": "eleven_monolingual_v1", "name": "ElevenLabs"}],
+            "default": "elevenlabs"
+        },
+        "quiz.prompt": {
+            "models": quiz_prompt_agent.SUPPORTED_MODELS,
+            "default": os.getenv("QUIZ_GEN_PROVIDER", "anthropic")
+        },
+        "quiz.questions": {
+            "models": quiz_questions_agent.SUPPORTED_MODELS,
+            "default": os.getenv("QUIZ_GEN_PROVIDER", "anthropic")
+        },
+        "orchestrator": {
+            "models": orchestrator_agent.SUPPORTED_MODELS,
+            "default": os.getenv("ORCHESTRATOR_PROVIDER", "anthropic")
+        }
+    }
+}
+
+AVAILABLE_MODELS = {
+    "script.lesson": script_agent.SUPPORTED_MODELS,
+    "image.slide": image_agent.SUPPORTED_MODELS,
+    "quiz.prompt": quiz_prompt_agent.SUPPORTED_MODELS,
+    "quiz.questions": quiz_questions_agent.SUPPORTED_MODELS,
+    "orchestrator": orchestrator_agent.SUPPORTED_MODELS
+}
+
+ROUTING_CONFIG_BYTES = orjson.dumps(ROUTING_CONFIG)
+AVAILABLE_MODELS_BYTES = orjson.dumps(AVAILABLE_MODELS)
+
+def _static_json(body: bytes) -> Response:
+    """Serve pre-serialized JSON with an ETag so clients can revalidate with a 304"""
+    response = Response(body, mimetype='application/json')
+    response.set_etag(hashlib.md5(body).hexdigest())
+    response.cache_control.public = True
+    response.cache_control.max_age = 300
+    return response.make_conditional(request)
 
 
 @app.route('/api/ai/router/config', methods=['GET'])
 def get_routing_config():
     """Get routing configuration with all available models"""
-    return jsonify({
-        "routingConfig": {
-            "script.lesson": {
-                "models": script_agent.SUPPORTED_MODELS,
-                "default": os.getenv("SCRIPT_GEN_PROVIDER", "anthropic")
-            },
-            "image.slide": {
-                "models": image_agent.SUPPORTED_MODELS,
-                "default": os.getenv("IMAGE_GEN_PROVIDER", "openai")
-            },
-            "speech.slide": {
-                "models": [{"provider": "elevenlabs", "model": "eleven_monolingual_v1", "name": "ElevenLabs"}],
-                "default": "elevenlabs"
-            },
-            "quiz.prompt": {
-                "models": quiz_prompt_agent.SUPPORTED_MODELS,
-                "default": os.getenv("QUIZ_GEN_PROVIDER", "anthropic")
-            },
-            "quiz.questions": {
-                "models": quiz_questions_agent.SUPPORTED_MODELS,
-                "default": os.getenv("QUIZ_GEN_PROVIDER", "anthropic")
-            },
-            "orchestrator": {
-                "models": orchestrator_agent.SUPPORTED_MODELS,
-                "default": os.getenv("ORCHESTRATOR_PROVIDER", "anthropic")
-            }
-        }
-    })
+    return _static_json(ROUTING_CONFIG_BYTES)
 
 
 @app.route('/api/ai/models', methods=['GET'])
 def get_available_models():
     """Get all available models for each task type"""
-    return jsonify({
-        "script.lesson": script_agent.SUPPORTED_MODELS,
-        "image.slide": image_agent.SUPPORTED_MODELS,
-        "quiz.prompt": quiz_prompt_agent.SUPPORTED_MODELS,
-        "quiz.questions": quiz_questions_agent.SUPPORTED_MODELS,
-        "orchestrator": orchestrator_agent.SUPPORTED_MODELS
-    })
+    return _static_json(AVAILABLE_MODELS_BYTES)
 
 
 @app.route('/api/ai/task/orchestrate', methods=['POST'])
+@handle_errors
 def orchestrate_task():
     """Orchestrate a task using the orchestrator agent"""
     # Capture request data in the Flask request context
-    data = request.json
+    try:
+        req = OrchestrateRequest.model_validate(request.get_json(silent=True) or {})
+    except ValidationError as e:
+        if any(err['loc'][0] == 'taskType' for err in e.errors()):
+            return jsonify({"error": "Missing task type"}), 400
+        return _validation_error(e)
+    task_type, params = req.task_type, req.params
+    provider = req.provider or 'google'
+    model = req.model
     
     async def _generate():
-        try:
-            task_type = data.get('taskType')
-            params = data.get('params', {})
-            provider = data.get('provider', 'google')
-            model = data.get('model')
-            compare_models = data.get('compare', False)
-            
-            if not task_type:
-                return jsonify({"error": "Missing task type"}), 400
-            
-            if compare_models:
-                results = {}
-                for model_config in orchestrator_agent.SUPPORTED_MODELS:
-                    try:
-                        result = await orchestrator_agent.route_task(
-                            task_type, params,
-                            provider=model_config['provider'],
-                            model=model_config['model']
-                        )
-                        results[model_config['name']] = result
-                    except Exception as e:
-                        results[model_config['name']] = {"error": str(e)}
-                return jsonify({"success": True, "data": results, "comparison": True})
-            else:
-                result = await orchestrator_agent.route_task(task_type, params, provider=provider, model=model)
-                return jsonify({"success": True, "data": result})
-        except Exception as e:
-            import traceback
-            error_msg = str(e)
-            error_trace = traceback.format_exc()
-            print(f"Error in generate_script: {error_msg}")
-            print(error_trace)
-            return jsonify({"success": False, "error": error_msg, "traceback": error_trace}), 500
+        if req.compare:
+            # Route with every orchestrator model at once rather than one after another
+            tasks = [
+                orchestrator_agent.route_task(task_type, params, provider=m['provider'], model=m['model'])
+                for m in orchestrator_agent.SUPPORTED_MODELS
+            ]
+            responses = await asyncio.gather(*tasks, return_exceptions=True)
+            results = {}
+            for model_config, response in zip(orchestrator_agent.SUPPORTED_MODELS, responses):
+                if isinstance(response, Exception):
+                    results[model_config['name']] = {"error": str(response)}
+                else:
+                    results[model_config['name']] = response
+            return jsonify({"success": True, "data": results, "comparison": True})
+        else:
+            result = await orchestrator_agent.route_task(task_type, params, provider=provider, model=model)
+            return jsonify({"success": True, "data": result})
     
-    try:
-        return run_async(_generate())
-    except Exception as e:
-        import traceback
-        error_msg = str(e)
-        error_trace = traceback.format_exc()
-        print(f"Error in run_async wrapper for generate_script: {error_msg}")
-        print(error_trace)
-        return jsonify({"success": False, "error": error_msg}), 500
+    return run_async(_generate())
 
 
 if __name__ == '__main__':
+    # Development server only - production runs under gunicorn (see gunicorn.conf.py)
     port = int(os.getenv('SAM_BRIDGE_PORT', 5001))
-    app.run(host='0.0.0.0', port=port, debug=True)
+    app.run(host='0.0.0.0', port=port, debug=os.getenv('FLASK_DEBUG') == '1', threaded=True)
 
@@ -3,11 +3,13 @@ Custom Metrics Processor
 Coordinates eye tracking and heart rate monitoring to provide unified metrics.
 """
 
+import concurrent.futures
+import os
 import time
 from heart_rate_monitor import HeartRateMonitor
+from eye_tracker_simple import EyeTracker as SimpleEyeTracker
 
-# Try to import eye tracker - fallback to simple version if MediaPipe API incompatible
-EyeTracker = None
+# Pick the eye tracker class once at import - fallback to simple version if MediaPipe API incompatible
 try:
     from eye_tracker import EyeTracker as EyeTrackerMP
     # Test if MediaPipe has solutions API (0.9.x has it, 0.10+ doesn't)
@@ -20,7 +22,18 @@ try:
 except (ImportError, AttributeError) as e:
     # Fallback to simple eye tracker
     print(f"⚠️ [CUSTOM] Using simple eye tracker (MediaPipe API incompatible): {e}")
-    from eye_tracker_simple import EyeTracker
+    EyeTracker = SimpleEyeTracker
+
+
+# Shared pool for the heart rate half of each frame; rPPG filtering (scipy/numpy)
+# and the eye tracker (OpenCV/MediaPipe) both release the GIL, so they overlap
+_TRACKER_EXECUTOR = concurrent.futures.ThreadPoolExecutor(
+    max_workers=int(os.getenv('CUSTOM_METRICS_WORKERS', os.cpu_count() or 4)),
+    thread_name_prefix="rppg"
+)
+
+# Shared stand-in for a tracker that returned no metrics this frame (never mutated)
+_NO_METRICS = {}
 
 
 class CustomMetricsProcessor:
@@ -41,16 +54,16 @@ class CustomMetricsProcessor:
         
         # Initialize eye tracker with error handling
         try:
-            if EyeTracker is not None:
-                self.eye_tracker = EyeTracker()
-            else:
-                from eye_tracker_simple import EyeTracker as SimpleEyeTracker
-                self.eye_tracker = SimpleEyeTracker()
+            self.eye_tracker = EyeTracker()
         except Exception as e:
             print(f"⚠️ [CUSTOM] Failed to initialize eye tracker, using simple version: {e}")
-            from eye_tracker_simple import EyeTracker as SimpleEyeTracker
             self.eye_tracker = SimpleEyeTracker()
         
+        # Trackers live as long as the processor (reset() clears them in place),
+        # so bind the per-frame entry points once
+        self._process_hr = self.heart_rate_monitor.process_frame
+        self._process_eye = self.eye_tracker.process_frame
+        
         self.frame_count = 0
         self.last_metrics = None
         self.initialized = False
@@ -71,75 +84,79 @@ class CustomMetricsProcessor:
         
         self.frame_count += 1
         
-        # Process with heart rate monitor
-        hr_metrics = self.heart_rate_monitor.process_frame(frame, timestamp)
-        
-        # Process with eye tracker
-        eye_metrics = self.eye_tracker.process_frame(frame, timestamp)
+        # Heart rate runs on the shared pool while the eye tracker runs here;
+        # neither tracker writes to the frame, so both can read it at once
+        hr_future = _TRACKER_EXECUTOR.submit(self._process_hr, frame, timestamp)
+        try:
+            eye_metrics = self._process_eye(frame, timestamp)
+        finally:
+            # Always wait so the monitor is never still busy when the next frame arrives
+            hr_metrics = hr_future.result()
+        
+        # Trackers return None/{} when they have nothing yet; their .get defaults
+        # are the "no reading" values, so the combined dict is built in one pass
+        hr_metrics = hr_metrics or _NO_METRICS
+        eye_metrics = eye_metrics or _NO_METRICS
+        heart_rate = hr_metrics.get('heart_rate')
+        signal_quality = hr_metrics.get('signal_quality', 0.0)
+        gaze_direction = eye_metrics.get('gaze_direction', 'unknown')
         
-        # Combine metrics
         combined_metrics = {
-            'heart_rate': None,
-            'breathing_rate': None,
-            'gaze_direction': 'unknown',
-            'blink_rate': None,
-            'eye_movement_stability': 0.0,
-            'focus_duration': 0.0,
-            'signal_quality': 0.0,
+            'heart_rate': heart_rate,
+            'breathing_rate': hr_metrics.get('breathing_rate'),
+            'gaze_direction': gaze_direction,
+            'blink_rate': eye_metrics.get('blink_rate'),
+            'eye_movement_stability': eye_metrics.get('eye_movement_stability', 0.0),
+            'focus_duration': eye_metrics.get('focus_duration', 0.0),
+            'signal_quality': signal_quality,
             'source': 'custom',
             'frame_count': self.frame_count,
-            'timestamp': timestamp
+            'timestamp': timestamp,
+            'overall_quality': self._calculate_overall_quality(
+                heart_rate is not None,
+                signal_quality,
+                gaze_direction != 'unknown'
+            )
         }
         
-        # Add heart rate metrics
-        if hr_metrics:
-            combined_metrics['heart_rate'] = hr_metrics.get('heart_rate')
-            combined_metrics['breathing_rate'] = hr_metrics.get('breathing_rate')
-            combined_metrics['signal_quality'] = hr_metrics.get('signal_quality', 0.0)
-        
-        # Add eye tracking metrics
-        if eye_metrics:
-            combined_metrics['gaze_direction'] = eye_metrics.get('gaze_direction', 'unknown')
-            combined_metrics['blink_rate'] = eye_metrics.get('blink_rate')
-            combined_metrics['eye_movement_stability'] = eye_metrics.get('eye_movement_stability', 0.0)
-            combined_metrics['focus_duration'] = eye_metrics.get('focus_duration', 0.0)
-        
-        # Calculate overall quality score
-        quality_score = self._calculate_overall_quality(combined_metrics)
-        combined_metrics['overall_quality'] = quality_score
-        
         self.last_metrics = combined_metrics
         self.initialized = True
         
         return combined_metrics
     
-    def _calculate_overall_quality(self, metrics):
+    @staticmethod
+    def _calculate_overall_quality(has_heart_rate, signal_quality, gaze_known, face_detected=False, eye_stability=0.0):
         """
         Calculate overall quality score based on available metrics.
         
+        Takes plain scalars rather than the metrics dict so the per-frame
+        call does no dict lookups.
+        
         Args:
-            metrics: Dictionary of metrics
+            has_heart_rate: Whether a heart rate reading is available
+            signal_quality: Heart rate signal quality
+            gaze_known: Whether gaze direction was detected
+            face_detected: Whether the eye tracker saw a face
+            eye_stability: Eye movement stability
             
         Returns:
             Quality score 0-100
         """
         quality = 0.0
-        factors = 0
+        factors = 0.0
         
         # Heart rate quality
-        if metrics.get('heart_rate') is not None:
-            signal_quality = metrics.get('signal_quality', 0.0)
+        if has_heart_rate:
             quality += signal_quality * 0.4  # 40% weight
             factors += 0.4
         
         # Eye tracking quality
-        if metrics.get('face_detected', False):
-            eye_stability = metrics.get('eye_movement_stability', 0.0)
+        if face_detected:
             quality += eye_stability * 0.3  # 30% weight
             factors += 0.3
         
         # Gaze detection quality
-        if metrics.get('gaze_direction') != 'unknown':
+        if gaze_known:
             quality += 30.0  # 30% weight
             factors += 0.3
         
@@ -71,7 +71,7 @@ class EyeTracker:
         # Focus metrics
         self.focus_start_time = None
         self.total_focus_time = 0.0
-        self.last_update_time = time.time()
+        self.last_update_time = time.monotonic()  # interval bookkeeping only - immune to wall-clock jumps
     
     def _calculate_ear(self, landmarks, eye_points):
         """
@@ -228,7 +228,7 @@ class EyeTracker:
         if self.last_blink_time is None:
             return None
         
-        current_time = time.time()
+        current_time = time.monotonic()
         time_window = current_time - (self.last_update_time - 30.0)  # Last 30 seconds
         
         if time_window < 5.0:  # Need at least 5 seconds of data
@@ -310,7 +310,7 @@ class EyeTracker:
         self.eye_position_history.append(eye_center)
         
         # Update focus time
-        current_time = time.time()
+        current_time = time.monotonic()
         time_delta = current_time - self.last_update_time
         self.last_update_time = current_time
         
@@ -364,5 +364,5 @@ class EyeTracker:
         self.last_blink_time = None
         self.focus_start_time = None
         self.total_focus_time = 0.0
-        self.last_update_time = time.time()
+        self.last_update_time = time.monotonic()
 
@@ -39,7 +39,7 @@ class EyeTracker:
         # Focus metrics
         self.focus_start_time = None
         self.total_focus_time = 0.0
-        self.last_update_time = time.time()
+        self.last_update_time = time.monotonic()  # interval bookkeeping only - immune to wall-clock jumps
     
     def _calculate_gaze_direction(self, face_rect, frame_shape):
         """
@@ -128,7 +128,7 @@ class EyeTracker:
         self.face_position_history.append(face_center)
         
         # Update focus time
-        current_time = time.time()
+        current_time = time.monotonic()
         time_delta = current_time - self.last_update_time
         self.last_update_time = current_time
         
@@ -174,5 +174,5 @@ class EyeTracker:
         self.last_blink_time = None
         self.focus_start_time = None
         self.total_focus_time = 0.0
-        self.last_update_time = time.time()
+        self.last_update_time = time.monotonic()
 
@@ -0,0 +1,27 @@
+"""
+Gunicorn configuration for the SAM Bridge API
+Run with: gunicorn -c gunicorn.conf.py bridge_api:app
+"""
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('SAM_BRIDGE_PORT', 5001)}"
+
+# Threaded workers: request threads only block on run_async while the agent
+# calls overlap on each worker's background event loop. gevent's monkey
+# patching would turn that loop thread into a greenlet, so it is not used here.
+worker_class = "gthread"
+workers = int(os.getenv('SAM_BRIDGE_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv('SAM_BRIDGE_THREADS', 16))
+
+# LLM calls can take up to run_async's 180 second limit
+timeout = 200
+graceful_timeout = 30
+keepalive = 5
+
+# Load the app in each worker (not the master) so every worker starts its own event loop thread
+preload_app = False
+
+accesslog = "-"
+errorlog = "-"
+loglevel = os.getenv('LOG_LEVEL', 'info').lower()
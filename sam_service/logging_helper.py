@@ -0,0 +1,34 @@
+"""
+Logging Helper for the SAM service entry points
+Sets up console logging through a queue so request threads never block on stdout
+"""
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+
+_log_listener = None
+
+
+def setup_queued_logging():
+    """
+    Route root logging through a QueueHandler to a listener thread that writes to the console
+    Output stays print-like (message only) and the level comes from LOG_LEVEL
+    (default INFO). Safe to call more than once; only the first call configures logging.
+    """
+    global _log_listener
+    if _log_listener is not None:
+        return
+    
+    log_queue = queue.SimpleQueue()
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(logging.Formatter('%(message)s'))
+    _log_listener = logging.handlers.QueueListener(log_queue, console_handler)
+    _log_listener.start()
+    atexit.register(_log_listener.stop)
+    logging.basicConfig(
+        level=os.getenv('LOG_LEVEL', 'INFO').upper(),
+        format='%(message)s',
+        handlers=[logging.handlers.QueueHandler(log_queue)]
+    )
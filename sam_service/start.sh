@@ -8,4 +8,4 @@ cd "$(dirname "$0")"
 source .venv/bin/activate
 
 # Run the bridge API
-python bridge_api.py
+gunicorn -c gunicorn.conf.py bridge_api:app
@@ -0,0 +1,84 @@
+"""
+Tests for the bridge's agent call bookkeeping (coalescing, cancellation, concurrency slots)
+Run from sam_service with: python -m pytest tests
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import bridge_api  # noqa: E402
+
+
+def _wait_until(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+@pytest.fixture
+def slow_agent(monkeypatch):
+    """Replace the script agent with one that sleeps and records whether it was cancelled"""
+    state = {"started": 0, "cancelled": 0, "finished": 0}
+
+    async def _slow(message, meta):
+        state["started"] += 1
+        try:
+            await asyncio.sleep(message.get("delay", 5))
+        except asyncio.CancelledError:
+            state["cancelled"] += 1
+            raise
+        state["finished"] += 1
+        return {"script": message["topic"]}
+
+    monkeypatch.setitem(bridge_api.AGENT_DISPATCH, "script_agent", _slow)
+    return state
+
+
+def test_run_async_timeout_releases_agent_slot(slow_agent, monkeypatch):
+    # No queueing, so a slot still held by the abandoned call shows up as AgentBusyError
+    monkeypatch.setattr(bridge_api, "AGENT_QUEUE_SIZE", 0)
+
+    with pytest.raises(RuntimeError, match="timed out"):
+        bridge_api.run_async(
+            bridge_api.call_agent_directly("script_agent", {"topic": "timeout"}),
+            timeout=0.2
+        )
+    assert _wait_until(lambda: slow_agent["cancelled"] == 1)
+    assert slow_agent["finished"] == 0
+    assert not bridge_api._inflight
+
+    async def _fill_every_slot():
+        return await asyncio.gather(*(
+            bridge_api.call_agent_directly("script_agent", {"topic": f"slot {i}", "delay": 0.05})
+            for i in range(bridge_api.AGENT_MAX_CONCURRENCY)
+        ), return_exceptions=True)
+
+    results = bridge_api.run_async(_fill_every_slot(), timeout=5)
+    assert not [r for r in results if isinstance(r, Exception)]
+
+
+def test_shared_call_survives_one_waiter_leaving(slow_agent):
+    message = {"topic": "shared", "delay": 0.5}
+    results = {}
+
+    def _patient():
+        results["data"] = bridge_api.run_async(bridge_api.call_agent_directly("script_agent", message), timeout=5)
+
+    patient = threading.Thread(target=_patient)
+    patient.start()
+    assert _wait_until(lambda: slow_agent["started"] == 1)
+
+    with pytest.raises(RuntimeError):
+        bridge_api.run_async(bridge_api.call_agent_directly("script_agent", message), timeout=0.1)
+    patient.join()
+
+    assert results["data"] == {"script": "shared"}
+    assert slow_agent == {"started": 1, "cancelled": 0, "finished": 1}
@@ -18,23 +18,28 @@ import tempfile
 import threading
 import time
 import shutil
+import logging
+import traceback
 from collections import deque
+from logging_helper import setup_queued_logging
+
+# Log through a queue so per-frame logging never blocks the request thread on stdout
+setup_queued_logging()
+logger = logging.getLogger(__name__)
 
 # Import custom metrics processor for fallback
 try:
     from custom_metrics_processor import CustomMetricsProcessor
     CUSTOM_METRICS_AVAILABLE = True
-    print("✅ [INIT] Custom metrics processor imported successfully")
+    logger.info("✅ [INIT] Custom metrics processor imported successfully")
 except ImportError as e:
-    print(f"⚠️ [INIT] Warning: Custom metrics processor not available: {e}")
-    print("  Falling back to Presage SDK only. Install mediapipe and scipy for custom metrics.")
-    print("  Run: pip install mediapipe scipy")
+    logger.warning("⚠️ [INIT] Warning: Custom metrics processor not available: %s", e)
+    logger.warning("  Falling back to Presage SDK only. Install mediapipe and scipy for custom metrics.")
+    logger.warning("  Run: pip install mediapipe scipy")
     CUSTOM_METRICS_AVAILABLE = False
     CustomMetricsProcessor = None
 except Exception as e:
-    print(f"⚠️ [INIT] Error importing custom metrics processor: {e}")
-    import traceback
-    traceback.print_exc()
+    logger.exception("⚠️ [INIT] Error importing custom metrics processor: %s", e)
     CUSTOM_METRICS_AVAILABLE = False
     CustomMetricsProcessor = None
 
@@ -42,7 +47,7 @@ except Exception as e:
 try:
     import numpy as np
 except ImportError:
-    print("Warning: numpy not available. Some features may not work.")
+    logger.warning("Warning: numpy not available. Some features may not work.")
     np = None
 
 app = Flask(__name__)
@@ -63,6 +68,22 @@ FOCUS_BREATHING_STABILITY_THRESHOLD = 2.0  # Standard deviation
 THINKING_BREATHING_SLOW_THRESHOLD = 12  # BPM (slower breathing indicates thinking)
 THINKING_HEART_RATE_INCREASE = 10  # BPM increase from baseline
 
+# Frames arrive several times per second, so the formatted metric timestamp is
+# reused within a 100 ms bucket instead of calling datetime.now().isoformat() per frame
+_METRIC_TS_BUCKET_MS = 100
+_metric_ts_cache = (0, "")
+
+def _metric_timestamp():
+    """ISO timestamp for a metric reading, at most one 100 ms bucket stale"""
+    global _metric_ts_cache
+    now = time.time()
+    bucket = int(now * 1000) // _METRIC_TS_BUCKET_MS
+    cached_bucket, cached_ts = _metric_ts_cache
+    if bucket != cached_bucket:
+        cached_ts = datetime.fromtimestamp(now).isoformat(timespec='milliseconds')
+        _metric_ts_cache = (bucket, cached_ts)
+    return cached_ts
+
 
 class VitalsSession:
     """Manages a vitals collection session"""
@@ -89,9 +110,9 @@ class VitalsSession:
         if CUSTOM_METRICS_AVAILABLE and CustomMetricsProcessor:
             try:
                 self.custom_processor = CustomMetricsProcessor(fps=30)
-                print(f"✅ [SESSION] Custom metrics processor initialized for session: {session_id[:20]}...")
+                logger.info("✅ [SESSION] Custom metrics processor initialized for session: %s...", session_id[:20])
             except Exception as e:
-                print(f"⚠️ [SESSION] Failed to initialize custom metrics processor: {e}")
+                logger.warning("⚠️ [SESSION] Failed to initialize custom metrics processor: %s", e)
                 self.custom_processor = None
         
     def add_metrics(self, heart_rate, breathing_rate, gaze_direction='unknown', blink_rate=None, eye_movement_stability=0.0, focus_duration=0.0):
@@ -142,7 +163,7 @@ class VitalsSession:
             'blink_rate': blink_rate,
             'eye_movement_stability': eye_movement_stability,
             'focus_duration': focus_duration,
-            'timestamp': datetime.now().isoformat()
+            'timestamp': _metric_timestamp()
         }
         
         self.metrics_history.append(metric)
@@ -428,6 +449,36 @@ class VitalsSession:
         return result
 
 
+# Wrapper binaries in preference order: Swift wrapper first (macOS), then C++ wrapper
+PRESAGE_WRAPPER_NAMES = ('presage_wrapper', 'presage_wrapper_cpp')
+
+# Set once a wrapper is found; a miss is not cached because the wrapper may be built after startup
+_presage_wrapper_path = None
+
+def find_presage_wrapper():
+    """
+    Locate the Presage wrapper binary
+    The service directory is listed with a single scandir instead of stat-ing
+    each candidate; the cwd and PATH are only searched if no wrapper sits next
+    to this file. A found path is remembered for the rest of the process,
+    while a miss is retried on the next call.
+    """
+    global _presage_wrapper_path
+    if _presage_wrapper_path is not None:
+        return _presage_wrapper_path
+    service_dir = os.path.dirname(os.path.abspath(__file__))
+    with os.scandir(service_dir) as it:
+        present = {e.name: e.path for e in it if e.name in PRESAGE_WRAPPER_NAMES and e.is_file()}
+    for name in PRESAGE_WRAPPER_NAMES:
+        if name in present:
+            _presage_wrapper_path = present[name]
+            return _presage_wrapper_path
+    for name in PRESAGE_WRAPPER_NAMES:
+        if os.path.exists(name) or shutil.which(name):
+            _presage_wrapper_path = name
+            return _presage_wrapper_path
+    return None
+
 def process_frame_with_custom_metrics(frame_data, custom_processor=None, api_key=None):
     """
     Process a video frame using custom metrics (eye tracking + heart rate).
@@ -442,38 +493,22 @@ def process_frame_with_custom_metrics(frame_data, custom_processor=None, api_key
             
             if custom_vitals and (custom_vitals.get('heart_rate') is not None or custom_vitals.get('breathing_rate') is not None):
                 # Custom metrics available and working
-                print(f"✅ [CUSTOM] Using custom metrics: HR={custom_vitals.get('heart_rate')}, BR={custom_vitals.get('breathing_rate')}, Gaze={custom_vitals.get('gaze_direction')}")
+                logger.debug("✅ [CUSTOM] Using custom metrics: HR=%s, BR=%s, Gaze=%s",
+                             custom_vitals.get('heart_rate'), custom_vitals.get('breathing_rate'), custom_vitals.get('gaze_direction'))
                 custom_vitals['source'] = 'custom'
                 return custom_vitals
             else:
-                print(f"⚠️ [CUSTOM] Custom metrics returned None/empty, trying Presage fallback")
+                logger.debug("⚠️ [CUSTOM] Custom metrics returned None/empty, trying Presage fallback")
         except Exception as e:
-            print(f"❌ [CUSTOM] Custom metrics processing failed: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ [CUSTOM] Custom metrics processing failed: %s", e)
     
     # Fallback to Presage if custom metrics unavailable
-    import os
-    import json
-    
-    # Auto-detect wrapper: Try Swift wrapper first (macOS), then C++ wrapper
-    wrapper_paths = [
-        os.path.join(os.path.dirname(__file__), 'presage_wrapper'),
-        os.path.join(os.path.dirname(__file__), 'presage_wrapper_cpp'),
-        'presage_wrapper',
-        'presage_wrapper_cpp'
-    ]
-    
-    wrapper_path = None
-    for path in wrapper_paths:
-        if os.path.exists(path) or shutil.which(path):
-            wrapper_path = path
-            break
+    wrapper_path = find_presage_wrapper()
     
     # Try Presage SDK as fallback
     presage_vitals = None
-    if wrapper_path and (os.path.exists(wrapper_path) or shutil.which(wrapper_path)):
-        print(f"🔍 [DEBUG] Trying Presage wrapper at: {wrapper_path}")
+    if wrapper_path:
+        logger.debug("🔍 [DEBUG] Trying Presage wrapper at: %s", wrapper_path)
         # Save frame to temporary file
         temp_file = tempfile.NamedTemporaryFile(suffix='.jpg', delete=False)
         try:
@@ -498,19 +533,19 @@ def process_frame_with_custom_metrics(frame_data, custom_processor=None, api_key
                         'source': 'presage'
                     }
                 except json.JSONDecodeError as e:
-                    print(f"⚠️ [PRESAGE] Error parsing wrapper output: {e}")
-                    print(f"  Output: {result.stdout}")
-                    print(f"  Error: {result.stderr}")
+                    logger.warning("⚠️ [PRESAGE] Error parsing wrapper output: %s", e)
+                    logger.warning("  Output: %s", result.stdout)
+                    logger.warning("  Error: %s", result.stderr)
                     presage_vitals = None
             else:
-                print(f"⚠️ [PRESAGE] Wrapper error (code {result.returncode}): {result.stderr}")
+                logger.warning("⚠️ [PRESAGE] Wrapper error (code %s): %s", result.returncode, result.stderr)
                 presage_vitals = None
                 
         except subprocess.TimeoutExpired:
-            print("⚠️ [PRESAGE] Wrapper call timed out")
+            logger.warning("⚠️ [PRESAGE] Wrapper call timed out")
             presage_vitals = None
         except Exception as e:
-            print(f"⚠️ [PRESAGE] Error calling Presage wrapper: {e}")
+            logger.warning("⚠️ [PRESAGE] Error calling Presage wrapper: %s", e)
             presage_vitals = None
         finally:
             # Clean up temp file
@@ -519,18 +554,18 @@ def process_frame_with_custom_metrics(frame_data, custom_processor=None, api_key
             except:
                 pass
     else:
-        print(f"⚠️ [PRESAGE] Wrapper not found. Tried paths: {', '.join(wrapper_paths)}")
+        logger.debug("⚠️ [PRESAGE] Wrapper not found. Tried: %s", ', '.join(PRESAGE_WRAPPER_NAMES))
         presage_vitals = None
     
     # If Presage worked, return it
     if presage_vitals is not None and presage_vitals.get('heart_rate') and presage_vitals.get('breathing_rate'):
-        print(f"✅ [PRESAGE] Using Presage fallback: HR={presage_vitals.get('heart_rate')}, BR={presage_vitals.get('breathing_rate')}")
+        logger.debug("✅ [PRESAGE] Using Presage fallback: HR=%s, BR=%s", presage_vitals.get('heart_rate'), presage_vitals.get('breathing_rate'))
         return presage_vitals
     
     # Final fallback: simulated data (only if both custom and Presage failed)
-    print(f"⚠️ [FALLBACK] Both custom and Presage metrics failed, using simulated data")
+    logger.warning("⚠️ [FALLBACK] Both custom and Presage metrics failed, using simulated data")
     if custom_processor is None:
-        print(f"  Custom metrics not available (install mediapipe and scipy)")
+        logger.warning("  Custom metrics not available (install mediapipe and scipy)")
     import random
     return {
         'heart_rate': random.uniform(65, 85),
@@ -599,13 +634,13 @@ def process_frame():
         
         with session_lock:
             if session_id not in sessions:
-                print(f"⚠️ [FRAME] Session not found: {session_id[:30]}... | Available sessions: {list(sessions.keys())[:3]}")
+                logger.warning("⚠️ [FRAME] Session not found: %s... | Available sessions: %s", session_id[:30], list(sessions.keys())[:3])
                 return jsonify({'error': 'Session not found'}), 404
             
             session = sessions[session_id]
         
         # Log frame received
-        print(f"📹 [FRAME] Received frame - Session: {session_id[:20]}... | Size: {len(frame_base64)} bytes")
+        logger.debug("📹 [FRAME] Received frame - Session: %s... | Size: %s bytes", session_id[:20], len(frame_base64))
         
         # Decode frame
         try:
@@ -615,13 +650,12 @@ def process_frame():
             frame_array = np.frombuffer(frame_bytes, dtype=np.uint8)
             frame = cv2.imdecode(frame_array, cv2.IMREAD_COLOR)
         except Exception as decode_error:
-            print(f"⚠️ [FRAME] Failed to decode frame - Session: {session_id[:20]}... | Error: {str(decode_error)}")
-            import traceback
-            traceback.print_exc()
+            logger.warning("⚠️ [FRAME] Failed to decode frame - Session: %s... | Error: %s", session_id[:20], decode_error,
+                           exc_info=logger.isEnabledFor(logging.DEBUG))
             return jsonify({'error': f'Invalid frame data: {str(decode_error)}'}), 400
         
         if frame is None:
-            print(f"⚠️ [FRAME] Failed to decode frame (cv2.imdecode returned None) - Session: {session_id[:20]}...")
+            logger.warning("⚠️ [FRAME] Failed to decode frame (cv2.imdecode returned None) - Session: %s...", session_id[:20])
             return jsonify({'error': 'Invalid frame data: cv2.imdecode returned None'}), 400
         
         # Process with custom metrics (primary) - Presage as fallback
@@ -630,7 +664,8 @@ def process_frame():
         
         # Log source of metrics
         source = vitals.get('source', 'unknown')
-        print(f"📊 [FRAME] Using {source} metrics: HR={vitals.get('heart_rate', 'N/A')}, BR={vitals.get('breathing_rate', 'N/A')}, Gaze={vitals.get('gaze_direction', 'N/A')}")
+        logger.debug("📊 [FRAME] Using %s metrics: HR=%s, BR=%s, Gaze=%s", source,
+                     vitals.get('heart_rate', 'N/A'), vitals.get('breathing_rate', 'N/A'), vitals.get('gaze_direction', 'N/A'))
         
         # Extract eye tracking metrics from custom vitals
         gaze_direction = vitals.get('gaze_direction', 'unknown')
@@ -649,24 +684,20 @@ def process_frame():
         )
         
         # Log metrics in real-time for testing
-        print(f"📊 [METRICS] Frame processed - Session: {session_id[:20]}... | "
-              f"HR: {metric.get('heart_rate', 'N/A')} BPM | "
-              f"BR: {metric.get('breathing_rate', 'N/A')} BPM | "
-              f"Focus: {metric.get('focus_score', 0):.1f}/100 | "
-              f"Engagement: {metric.get('engagement_score', 0):.1f}/100 | "
-              f"Thinking: {metric.get('thinking_intensity', 0):.1f}/100 | "
-              f"Frame #{session.frame_count}")
+        logger.debug("📊 [METRICS] Frame processed - Session: %s... | HR: %s BPM | BR: %s BPM | "
+                     "Focus: %.1f/100 | Engagement: %.1f/100 | Thinking: %.1f/100 | Frame #%s",
+                     session_id[:20], metric.get('heart_rate', 'N/A'), metric.get('breathing_rate', 'N/A'),
+                     metric.get('focus_score', 0), metric.get('engagement_score', 0),
+                     metric.get('thinking_intensity', 0), session.frame_count)
         
         return jsonify({
             'success': True,
             'metrics': metric
         })
     except Exception as e:
-        import traceback
         error_msg = str(e)
         traceback_str = traceback.format_exc()
-        print(f"❌ [FRAME] Error processing frame: {error_msg}")
-        print(f"Traceback:\n{traceback_str}")
+        logger.error("❌ [FRAME] Error processing frame: %s\nTraceback:\n%s", error_msg, traceback_str)
         return jsonify({'error': error_msg, 'details': traceback_str}), 500
 
 
@@ -712,7 +743,8 @@ def stop_session():
 
 
 if __name__ == '__main__':
-    print(f'Starting Vitals Service on port {VITALS_SERVICE_PORT}')
-    print(f'Presage API Key configured: {bool(PRESAGE_API_KEY)}')
-    app.run(host='0.0.0.0', port=VITALS_SERVICE_PORT, debug=True)
+    logger.info('Starting Vitals Service on port %s', VITALS_SERVICE_PORT)
+    logger.info('Presage API Key configured: %s', bool(PRESAGE_API_KEY))
+    # Debugger/reloader only on request - the Docker image runs this entry point directly
+    app.run(host='0.0.0.0', port=VITALS_SERVICE_PORT, debug=os.getenv('FLASK_DEBUG') == '1', threaded=True)
 